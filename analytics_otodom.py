@@ -1,56 +1,216 @@
 # analytics_otodom.py
-import re
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import warnings
 from pathlib import Path
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.ticker import StrMethodFormatter
 
+from cube_otodom import cube_for
+from map_otodom import choropleth
+
 CSV_PATH = Path("otodom_wynajem.csv")   # zmień, jeśli plik jest gdzie indziej
 
+# Kolumny tekstowe zamieniane na liczby (kolumna + "_num")
+NUMERIC_COLUMNS = ["miesięcznie", "czynsz", "kaucja", "powierzchnia"]
+# Kolumny potrzebne funkcjom z tego pliku i test.py – tylko je wczytuje `load_and_clean(columns=...)`
+ANALYSIS_COLUMNS = NUMERIC_COLUMNS + ["liczba pokoi", "typ ogłoszeniodawcy", "województwo",
+                                      "miasto", "dzielnica", "data_pobrania"]
+
+# Silnik pyarrow czyta CSV wielowątkowo; bez pyarrow zostaje domyślny silnik C
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+TRIM_QUANTILES = (0.05, 0.95)  # odrzucane skrajne ceny miesięczne (dolny i górny kwantyl)
+CLEAN_CACHE = True   # oczyszczona ramka zapisywana obok CSV (Feather) i używana, dopóki CSV się nie zmieni
+
 # ─────────────────────────────────────────────────────────────
 # ► 1. PRZYGOTOWANIE DANYCH
 # ─────────────────────────────────────────────────────────────
-def load_and_clean(csv_path: Path = CSV_PATH) -> pd.DataFrame:
+def _per_unique(s: pd.Series, convert) -> pd.Series:
+    """
+    Stosuje wektorową konwersję *convert* tylko do unikalnych wartości kolumny i rozkłada
+    wynik z powrotem po wierszach – w historii te same teksty ("3 200 zł") powtarzają się
+    tysiące razy, więc to dużo tańsze niż operacje tekstowe na każdym wierszu.
+    """
+    codes, uniques = pd.factorize(s)
+    values = convert(pd.Series(uniques, dtype="str")).to_numpy(dtype="float64")
+    return pd.Series(np.where(codes >= 0, values[codes], np.nan), index=s.index, name=s.name)
+
+
+def to_number(s: pd.Series) -> pd.Series:
+    """
+    "OdPLN-owanie" całej kolumny, np. "3 200 zł" → 3200.0, "45,5 m²" → 45.5.
+    Zostawia cyfry, przecinki, kropki i minus; tekst bez poprawnej liczby
+    (np. "brak informacji") daje NaN.
+    """
+    def convert(text: pd.Series) -> pd.Series:
+        cleaned = text.str.replace(r"[^\d,.-]", "", regex=True).str.replace(",", ".", regex=False)
+        return pd.to_numeric(cleaned, errors="coerce")
+    return _per_unique(s, convert)
+
+
+def rooms_number(s: pd.Series) -> pd.Series:
+    """Pierwsza liczba z opisu liczby pokoi, np. "3" → 3.0, "6 lub więcej" → 6.0."""
+    return _per_unique(s, lambda text: text.str.extract(r"(\d+)", expand=False).astype("float64"))
+
+
+def load_and_clean(csv_path: Path = CSV_PATH, columns: list[str] | None = None,
+                   cache: bool = CLEAN_CACHE, dedup: bool = False) -> pd.DataFrame:
     """
     Wczytuje CSV z Otodom, czyści ceny, czynsz, kaucję i powierzchnię,
     usuwa skrajne wartości cenowe oraz dorzuca parę zmiennych pomocniczych.
+    Wszystkie kolumny z pliku wczytywane są jako tekst (kolumny "_num" to float64,
+    data_pobrania – datetime64); *columns* ogranicza wczytywanie do podanych kolumn,
+    np. `ANALYSIS_COLUMNS` przy dużej historii.
+    Przy *dedup* zostaje po jednej ofercie z każdego klastra duplikatów (to samo mieszkanie
+    pod różnymi URL-ami, zob. dedup_otodom.py) – przed odrzuceniem skrajnych cen.
+    Przy *cache* wynik jest zapamiętywany obok CSV (`clean_cache_path`) i wczytywany
+    ponownie, dopóki nie zmieni się plik źródłowy ani kod czyszczący.
     """
-    df = pd.read_csv(csv_path)
-
-    # Pomocnicza funkcja do "odPLN-owania" zapisu typu "3 200 zł"
-    def to_number(x):
-        if pd.isna(x):
-            return np.nan
-        x = re.sub(r"[^\d,.-]", "", str(x)).replace(",", ".")
-        try:
-            return float(x)
-        except ValueError:
-            return np.nan
-
-    for col in ["miesięcznie", "czynsz", "kaucja", "powierzchnia"]:
-        if col in df.columns:
-            df[col + "_num"] = df[col].apply(to_number)
+    if not cache:
+        return _clean(csv_path, columns, dedup)
+    key = _clean_cache_key(csv_path, columns, dedup)
+    df = read_clean_cache(csv_path, columns, key, dedup)
+    if df is None:
+        df = _clean(csv_path, columns, dedup)
+        write_clean_cache(df, csv_path, columns, key, dedup)
+    return df
+
+
+def _clean(csv_path: Path, columns: list[str] | None, dedup: bool = False) -> pd.DataFrame:
+    extra = []  # kolumny wczytane tylko na potrzeby wykrywania duplikatów
+    if dedup and columns is not None:
+        from dedup_otodom import DEDUP_COLUMNS
+        header = pd.read_csv(csv_path, nrows=0).columns
+        extra = [col for col in DEDUP_COLUMNS if col in header and col not in columns]
+    df = clean_columns(pd.read_csv(csv_path, usecols=columns and columns + extra, dtype="str", engine=CSV_ENGINE))
+
+    # Jedna oferta z każdego klastra duplikatów
+    if dedup:
+        from dedup_otodom import collapse_duplicates
+        df = collapse_duplicates(df).drop(columns=extra)
 
     # Odrzucenie skrajnych 5% wartości miesięcznej ceny najmu
     if "miesięcznie_num" in df.columns:
-        low = df["miesięcznie_num"].quantile(0.05)
-        high = df["miesięcznie_num"].quantile(0.95)
+        low = df["miesięcznie_num"].quantile(TRIM_QUANTILES[0])
+        high = df["miesięcznie_num"].quantile(TRIM_QUANTILES[1])
         df = df[(df["miesięcznie_num"] >= low) & (df["miesięcznie_num"] <= high)]
 
+    return df
+
+
+def clean_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Dokłada do wczytanego (tekstowego) fragmentu danych kolumny liczbowe – operacje wiersz
+    po wierszu, bez odrzucania skrajnych cen, więc działa też na kawałkach pliku
+    (zob. streaming_otodom.py).
+    """
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col + "_num"] = to_number(df[col])
+
     # Cena za metr
     df["cena_m2"] = df["miesięcznie_num"] / df["powierzchnia_num"]
 
     # Liczba pokoi jako float
     if "liczba pokoi" in df.columns:
-        df["pokoje_num"] = df["liczba pokoi"].str.extract(r"(\d+)").astype(float)
+        df["pokoje_num"] = rooms_number(df["liczba pokoi"])
 
-    # Czas w pandas-datetime
-    df["data_pobrania"] = pd.to_datetime(df["data_pobrania"], errors="coerce")
+    # Czas w pandas-datetime (format zapisu z main_otodom.py, z datą bez godziny też sobie radzi)
+    df["data_pobrania"] = pd.to_datetime(df["data_pobrania"], format="ISO8601", errors="coerce")
 
     return df
 
 
+def clean_cache_path(csv_path: Path, columns: list[str] | None = None, dedup: bool = False) -> Path:
+    """
+    Plik cache obok źródła, osobny dla każdego zestawu kolumn (i wersji bez duplikatów),
+    np. '.otodom_wynajem.clean-3fa4c1d2.feather', '.otodom_wynajem.clean-3fa4c1d2-dedup.feather'.
+    """
+    csv_path = Path(csv_path)
+    tag = hashlib.sha1(json.dumps(columns, ensure_ascii=False).encode()).hexdigest()[:8]
+    return csv_path.with_name(f".{csv_path.stem}.clean-{tag}{'-dedup' if dedup else ''}.feather")
+
+
+def _clean_cache_key(csv_path: Path, columns: list[str] | None, dedup: bool = False) -> str:
+    """
+    Rozmiar i czas modyfikacji źródła + skrót kodu czyszczącego i jego ustawień (progi
+    odcięcia cen, kolumny liczbowe) – zmiana czegokolwiek unieważnia cache.
+    """
+    stat = Path(csv_path).stat()
+    code = "".join(inspect.getsource(f) for f in (_clean, clean_columns, _per_unique, to_number, rooms_number))
+    if dedup:
+        import dedup_otodom
+        code += inspect.getsource(dedup_otodom)
+    return json.dumps({
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "code": hashlib.sha1(code.encode()).hexdigest(),
+        "columns": columns,
+        "numeric": NUMERIC_COLUMNS,
+        "trim": list(TRIM_QUANTILES),
+        "engine": CSV_ENGINE,
+        "dedup": dedup,
+        "pandas": pd.__version__,
+    }, ensure_ascii=False)
+
+
+def read_clean_cache(csv_path: Path, columns: list[str] | None, key: str,
+                     dedup: bool = False) -> pd.DataFrame | None:
+    """
+    Oczyszczona ramka z cache albo None, gdy cache nie istnieje lub jest nieaktualny.
+    Uszkodzony plik (np. ucięty przy przerwanym zapisie) jest usuwany.
+    """
+    path = clean_cache_path(csv_path, columns, dedup)
+    try:
+        from pyarrow import feather, ipc
+        with ipc.open_file(path) as reader:  # sam schemat – bez wczytywania danych
+            metadata = reader.schema.metadata or {}
+        if metadata.get(b"otodom_clean_key", b"").decode() != key:
+            return None
+        return feather.read_table(path).to_pandas()
+    except (ImportError, OSError):
+        return None
+    except ValueError as e:  # pyarrow.ArrowInvalid – plik nie jest poprawnym Featherem
+        warnings.warn(f"Uszkodzony cache oczyszczonych danych '{path}' – zostanie odtworzony ({e})")
+        path.unlink(missing_ok=True)
+        return None
+
+
+def write_clean_cache(df: pd.DataFrame, csv_path: Path, columns: list[str] | None, key: str,
+                      dedup: bool = False):
+    """Zapisuje oczyszczoną ramkę (z indeksem) jako Feather z kluczem w metadanych schematu."""
+    path = clean_cache_path(csv_path, columns, dedup)
+    try:
+        import pyarrow as pa
+        from pyarrow import feather
+    except ImportError:
+        return  # bez pyarrow po prostu czyścimy za każdym razem
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    table = table.replace_schema_metadata({**table.schema.metadata, b"otodom_clean_key": key.encode()})
+    tmp = None
+    try:
+        # własny plik tymczasowy każdego zapisu, potem atomowa zamiana – równoległa sesja
+        # nie zobaczy połowy pliku ani nie nadpisze cudzego pliku tymczasowego
+        fd, tmp = tempfile.mkstemp(suffix=".tmp", prefix=path.name + ".", dir=path.parent)
+        os.close(fd)
+        feather.write_feather(table, tmp, compression="lz4")
+        os.replace(tmp, path)
+    except OSError as e:
+        if tmp is not None:
+            Path(tmp).unlink(missing_ok=True)
+        warnings.warn(f"Nie udało się zapisać cache oczyszczonych danych ({e})")
+
+
 # ─────────────────────────────────────────────────────────────
 # ► 2. ANALIZY – KAŻDA JAKO ODDZIELNA FUNKCJA
 # ─────────────────────────────────────────────────────────────
@@ -92,8 +252,9 @@ def boxplot_city(df: pd.DataFrame, top_n: int = 10, show: bool = True):
     if "miasto" not in df.columns:
         raise ValueError("Kolumna 'miasto' nie istnieje")
 
-    city_counts = df["miasto"].value_counts().head(top_n).index
-    subset = df[df["miasto"].isin(city_counts)]
+    cube = cube_for(df)
+    city_counts = cube.stats("miasto")["liczba_ogłoszeń"].sort_values(ascending=False, kind="stable").head(top_n).index
+    subset = pd.concat([cube.city_rows(city) for city in city_counts])
 
     fig, ax = plt.subplots(figsize=(10, 6))
     subset.boxplot(column="cena_m2", by="miasto", ax=ax)
@@ -111,7 +272,7 @@ def boxplot_city(df: pd.DataFrame, top_n: int = 10, show: bool = True):
 
 def bar_price_by_rooms(df: pd.DataFrame, show: bool = True):
     """Średnia cena najmu vs. liczba pokoi."""
-    grouped = df.groupby("pokoje_num")["miesięcznie_num"].mean().dropna()
+    grouped = cube_for(df).stats("pokoje")["średnia_cena"].dropna()
 
     fig, ax = plt.subplots()
     grouped.plot(kind="bar", ax=ax)
@@ -125,7 +286,7 @@ def bar_price_by_rooms(df: pd.DataFrame, show: bool = True):
 
 def bar_count_by_rooms(df: pd.DataFrame, show: bool = True):
     """Liczba ofert najmu wg liczby pokoi."""
-    counts = df["pokoje_num"].value_counts().sort_index()
+    counts = cube_for(df).stats("pokoje")["liczba_ogłoszeń"].sort_index()
 
     fig, ax = plt.subplots()
     counts.plot(kind="bar", ax=ax, color="#5DADE2", edgecolor="black")
@@ -157,44 +318,19 @@ def pie_advertiser_type(df: pd.DataFrame, show: bool = True):
 # ─────────────────────────────────────────────────────────────
 # ── NOWE FUNKCJE – MAPY / BAR CHART + HISTOGRAM  ─────────────
 # ─────────────────────────────────────────────────────────────
-import warnings
 
 def _plot_or_map(grouped, value_label: str, cmap: str = "Blues", show: bool = True):
     """
-    Jeżeli dostępne jest GeoPandas + shapefile PL (województwa), rysuje mapę choropleth.
-    W przeciwnym razie – zwykły wykres słupkowy.
+    Rysuje mapę choropleth województw z dołączonego poland.voivodeships.json (map_otodom.py).
+    Jeśli mapy nie da się narysować (np. brak pliku lub nazw województw w danych) –
+    zwykły wykres słupkowy.
     """
     try:
-        import geopandas as gpd
-        shp = gpd.read_file(gpd.datasets.get_path("naturalearth_lowres"))
-        # naturalearth nie ma PL województw – próbujemy user-supplied:
-        voiv_path = Path("wojewodztwa.shp")
-        if voiv_path.exists():
-            shp = gpd.read_file(voiv_path)
-        else:
-            raise FileNotFoundError
-        # Normalizujemy kolumnę z nazwą województwa
-        name_col = next(c for c in shp.columns if "name" in c.lower())
-        shp["wojewodztwo"] = (
-            shp[name_col]
-            .str.replace("województwo", "", case=False, regex=False)
-            .str.strip()
-            .str.capitalize()
-        )
-
-        g = shp.merge(grouped, how="left", on="wojewodztwo")
-        fig, ax = plt.subplots(figsize=(7, 7))
-        g.plot(column=value_label, ax=ax, legend=True,
-               legend_kwds={"label": value_label, "orientation": "vertical"},
-               edgecolor="black", linewidth=0.4, cmap=cmap, missing_kwds={
-                   "color": "lightgrey",
-                   "label": "Brak danych"})
-        ax.set_axis_off()
-        ax.set_title(f"{value_label} – mapa województw")
+        fig = choropleth(grouped, value_label, cmap=cmap)
         if show:
             plt.show()
         return fig
-    except Exception as e:
+    except (OSError, ValueError, KeyError) as e:
         # cicho przechodzimy na słupki
         warnings.warn(f"Mapa nie została wygenerowana ({e}). Pokazuję wykres słupkowy.")
         fig, ax = plt.subplots()
@@ -212,14 +348,14 @@ def _plot_or_map(grouped, value_label: str, cmap: str = "Blues", show: bool = Tr
 
 def map_or_bar_avg_price(df: pd.DataFrame, show: bool = True):
     """Średnia *cena* najmu w województwach (mapa lub bar)."""
-    grouped = df.groupby("województwo")["miesięcznie_num"].mean().round(0).dropna()
+    grouped = cube_for(df).stats("województwo")["średnia_cena"].round(0).dropna()
     grouped.name = "Średnia cena [PLN]"
     return _plot_or_map(grouped, grouped.name, cmap="Reds", show=show)
 
 
 def map_or_bar_avg_price_m2(df: pd.DataFrame, show: bool = True):
     """Średnia *cena za m²* w województwach (mapa lub bar)."""
-    grouped = df.groupby("województwo")["cena_m2"].mean().round(0).dropna()
+    grouped = cube_for(df).stats("województwo")["średnia_cena_m2"].round(0).dropna()
     grouped.name = "Średnia cena za m² [PLN]"
     return _plot_or_map(grouped, grouped.name, cmap="Oranges", show=show)
 
@@ -229,7 +365,7 @@ def hist_rent_city(df: pd.DataFrame, city: str, bins: int = 40, show: bool = Tru
     Histogram cen dla wskazanego miasta (argument *city* – np. 'Warszawa').
     Jeśli miasto nie występuje, zgłasza wyjątek.
     """
-    subset = df[df["miasto"].str.lower() == city.lower()]
+    subset = cube_for(df).city_rows(city, case=False)
     if subset.empty:
         raise ValueError(f"Brak ogłoszeń dla miasta: {city}")
     fig, ax = plt.subplots()
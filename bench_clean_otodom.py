@@ -0,0 +1,114 @@
+# bench_clean_otodom.py
+"""
+Benchmark `load_and_clean`: poprzednia wersja (to_number przez .apply na kolumnach object)
+kontra wersja wektorowa z analytics_otodom.py – na syntetycznym CSV o zadanej liczbie wierszy.
+Sprawdza też, że obie dają te same wyniki.
+
+    python bench_clean_otodom.py --rows 1000000
+"""
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics_otodom import ANALYSIS_COLUMNS, load_and_clean
+from writer_otodom import POLISH_COLUMNS
+
+MISSING = "brak informacji"
+
+
+def make_csv(path: Path, rows: int, seed: int = 0):
+    """Syntetyczna historia w formacie zapisywanym przez main_otodom.py."""
+    rng = np.random.default_rng(seed)
+
+    def money(values, missing_share):
+        text = pd.Series([f"{v:,}".replace(",", " ") + " zł" for v in values])
+        return text.mask(rng.random(rows) < missing_share, MISSING)
+
+    area = rng.uniform(15, 150, rows).round(1)
+    df = pd.DataFrame({col: MISSING for col in POLISH_COLUMNS.values()}, index=range(rows))
+    df["tytuł"] = "Mieszkanie do wynajęcia"
+    df["miesięcznie"] = money(rng.integers(900, 15000, rows), 0.01)
+    df["kaucja"] = money(rng.integers(900, 15000, rows), 0.3)
+    df["czynsz"] = money(rng.integers(0, 1200, rows), 0.2)
+    df["powierzchnia"] = pd.Series(area).astype(str).where(rng.random(rows) < 0.5,
+                                                           pd.Series(area).astype(str).str.replace(".", ",") + " m²")
+    df["liczba pokoi"] = rng.choice(["1", "2", "3", "4", "5", "6 lub więcej", MISSING], rows)
+    df["typ ogłoszeniodawcy"] = rng.choice(["prywatny", "biuro nieruchomości", "deweloper"], rows)
+    df["województwo"] = rng.choice(["mazowieckie", "małopolskie", "śląskie", "pomorskie", MISSING], rows)
+    df["miasto"] = rng.choice(["Warszawa", "Kraków", "Katowice", "Gdańsk", "Poznań"], rows)
+    df["dzielnica"] = rng.choice(["Mokotów", "Śródmieście", "Wola", MISSING], rows)
+    df["url"] = [f"https://www.otodom.pl/pl/oferta/o-{i}" for i in range(rows)]
+    df["data_pobrania"] = pd.Timestamp("2025-01-01") + pd.to_timedelta(rng.integers(0, 3e7, rows), unit="s")
+    df["data_pobrania"] = df["data_pobrania"].dt.strftime("%Y-%m-%d %H:%M:%S")
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def load_and_clean_legacy(csv_path: Path) -> pd.DataFrame:
+    """Poprzednia implementacja `load_and_clean` – punkt odniesienia."""
+    df = pd.read_csv(csv_path)
+
+    def to_number(x):
+        if pd.isna(x):
+            return np.nan
+        x = re.sub(r"[^\d,.-]", "", str(x)).replace(",", ".")
+        try:
+            return float(x)
+        except ValueError:
+            return np.nan
+
+    for col in ["miesięcznie", "czynsz", "kaucja", "powierzchnia"]:
+        if col in df.columns:
+            df[col + "_num"] = df[col].apply(to_number)
+
+    if "miesięcznie_num" in df.columns:
+        low = df["miesięcznie_num"].quantile(0.05)
+        high = df["miesięcznie_num"].quantile(0.95)
+        df = df[(df["miesięcznie_num"] >= low) & (df["miesięcznie_num"] <= high)]
+
+    df["cena_m2"] = df["miesięcznie_num"] / df["powierzchnia_num"]
+    if "liczba pokoi" in df.columns:
+        df["pokoje_num"] = df["liczba pokoi"].str.extract(r"(\d+)").astype(float)
+    df["data_pobrania"] = pd.to_datetime(df["data_pobrania"], errors="coerce")
+    return df
+
+
+def timed(label: str, func, *args, **kwargs) -> pd.DataFrame:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    print(f"{label:<40} {time.perf_counter() - start:8.2f} s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--csv", type=Path, help="istniejący plik zamiast syntetycznego")
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = options.csv
+        if path is None:
+            path = Path(tmp) / "historia.csv"
+            timed(f"generowanie {options.rows:,} wierszy", make_csv, path, options.rows)
+
+        legacy = timed("load_and_clean (poprzednia wersja)", load_and_clean_legacy, path)
+        full = timed("load_and_clean", load_and_clean, path, cache=False)
+        projected = timed("load_and_clean(columns=ANALYSIS_COLUMNS)", load_and_clean, path,
+                          columns=ANALYSIS_COLUMNS, cache=False)
+
+    derived = ["miesięcznie_num", "czynsz_num", "kaucja_num", "powierzchnia_num", "cena_m2",
+               "pokoje_num", "data_pobrania"]
+    for df in (full, projected):
+        pd.testing.assert_index_equal(df.index, legacy.index)
+        for col in derived:
+            pd.testing.assert_series_equal(df[col], legacy[col], check_dtype=False, check_index_type=False)
+    print("✔ Wyniki zgodne z poprzednią wersją")
+
+
+if __name__ == "__main__":
+    main()
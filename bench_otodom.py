@@ -0,0 +1,519 @@
+# bench_otodom.py
+"""
+Benchmarki scrapera i analiz bez dostępu do otodom.pl – do wykrywania regresji przed wdrożeniem.
+
+Część "scraper" uruchamia lokalny zamiennik serwisu (`StandInServer`), który serwuje strony
+wyników i ofert z szablonów w katalogu fixtures/ (przycięte kopie stron otodom.pl) z zadanym
+opóźnieniem i odsetkiem błędów 503, i mierzy `fetch_soup`, `parse_listing`,
+`get_listing_links`, `parse_html` oraz `parse_location`. Część "dane" mierzy
+`load_and_clean`, kostkę agregatów i funkcje wykresów na syntetycznych zbiorach
+od 10 tys. do 5 mln wierszy (pliki generowane raz i trzymane w --data-dir). Część "poprawność"
+sprawdza na zamienniku scenariusze crawla, które psuły wynik (np. wznowienie crawla
+przyrostowego) – wykryty błąd też kończy się kodem wyjścia 1.
+
+    python bench_otodom.py --save wyniki.json
+    python bench_otodom.py --rows 10000 100000 --baseline wyniki.json   # kod wyjścia 1 przy regresji
+    python bench_otodom.py --serve 8000 --latency 0.2 --error-rate 0.1
+    python main_otodom.py --search-url http://127.0.0.1:8000/pl/oferty/wynajem/mieszkanie --limit 100
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from threading import Lock, Thread
+from urllib.parse import parse_qs, urlparse
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+import main_otodom  # noqa: E402
+from analytics_otodom import (  # noqa: E402
+    bar_count_by_rooms, bar_price_by_rooms, boxplot_city, hist_rent, hist_rent_city, load_and_clean,
+    map_or_bar_avg_price, map_or_bar_avg_price_m2, pie_advertiser_type, scatter_price_area,
+)
+from bench_clean_otodom import make_csv  # noqa: E402
+from cube_otodom import AggregateCube, cube_for  # noqa: E402
+from discovery_otodom import region_slug  # noqa: E402
+from parser_otodom import parse_html, parse_location  # noqa: E402
+from report_otodom import _render, chart_jobs  # noqa: E402
+
+FIXTURES_DIR = Path(__file__).with_name("fixtures")
+DATA_DIR = Path(tempfile.gettempdir()) / "otodom_bench"   # wygenerowane zbiory, używane ponownie
+ROW_COUNTS = [10_000, 100_000, 1_000_000, 5_000_000]
+SEARCH_PATH = "/pl/oferty/wynajem/mieszkanie"
+PAGES = 20         # stron wyników serwowanych przez zamiennik
+PER_PAGE = 36      # ofert na stronie (jak na otodom.pl)
+REQUESTS = 300     # zapytań o oferty w benchmarkach sieciowych
+PARSES = 500       # stron parsowanych w benchmarku parse_html
+LOCATIONS = 50_000 # wywołań parse_location
+REPEAT = 3         # powtórzeń pomiarów na zbiorach danych
+TOLERANCE = 0.25   # spadek przepustowości względem --baseline uznawany za regresję
+
+# (adres, województwo, powiat, miasto, dzielnica) – lokalizacje ofert zamiennika
+PLACES = [
+    ("ul. Puławska", "mazowieckie", None, "Warszawa", "Mokotów"),
+    ("ul. Marszałkowska", "mazowieckie", None, "Warszawa", "Śródmieście"),
+    (None, "mazowieckie", None, "Warszawa", "Wola"),
+    ("ul. Karmelicka", "małopolskie", None, "Kraków", "Stare Miasto"),
+    (None, "małopolskie", None, "Kraków", "Podgórze"),
+    ("ul. Mariacka", "pomorskie", None, "Gdańsk", "Śródmieście"),
+    (None, "śląskie", None, "Katowice", None),
+    ("ul. Głogowska", "wielkopolskie", None, "Poznań", "Grunwald"),
+    (None, "dolnośląskie", None, "Wrocław", "Krzyki"),
+    ("ul. Piotrkowska", "łódzkie", None, "Łódź", "Śródmieście"),
+    (None, "małopolskie", "wielicki", "Wieliczka", None),
+    ("ul. Lipowa", "lubelskie", None, "Lublin", "Śródmieście"),
+]
+ADVERTISERS = ["prywatny", "biuro nieruchomości", "deweloper"]
+
+
+# ---------- korpus stron ----------
+@lru_cache(maxsize=None)
+def _template(name: str) -> Template:
+    return Template((FIXTURES_DIR / name).read_text(encoding="utf-8"))
+
+
+def offer(i: int) -> dict:
+    """Deterministyczne dane oferty nr *i* serwowanej przez zamiennik."""
+    street, voivodeship, powiat, city, district = PLACES[i % len(PLACES)]
+    rng = random.Random(i)
+    area = round(rng.uniform(18, 140), 1)
+    price = int(area * rng.uniform(40, 110)) // 10 * 10
+    rooms = min(1 + int(area // 28), 6)
+    street = f"{street} {1 + i % 150}" if street else None
+    return {
+        "id": i,
+        "slug": f"mieszkanie-{rooms}-pokojowe-{region_slug(city)}-ID{i:06d}",
+        "title": f"{rooms}-pokojowe mieszkanie, {city}" + (f", {district}" if district else ""),
+        "price": price, "area": area, "rooms": rooms, "rent": rng.randrange(300, 1200, 10),
+        "deposit": price, "floor": f"{i % 8}/8", "year": 1960 + i % 65,
+        "advertiser": ADVERTISERS[i % len(ADVERTISERS)],
+        "location": ", ".join(p for p in (street, district, city, powiat, voivodeship) if p),
+        "address": (street, district, city, powiat or city, voivodeship),
+    }
+
+
+def _money(value: int) -> str:
+    return f"{value:,}".replace(",", " ")
+
+
+def _next_data(o: dict) -> str:
+    """Osadzony JSON Next.js (`props.pageProps.ad`) w formacie stron otodom.pl."""
+    street, district, city, county, province = o["address"]
+    characteristics = [
+        ("price", "Cena", o["price"], f"{_money(o['price'])} zł"),
+        ("m", "Powierzchnia", o["area"], f"{o['area']} m²"),
+        ("rooms_num", "Liczba pokoi", o["rooms"], str(o["rooms"])),
+        ("deposit", "Kaucja", o["deposit"], f"{_money(o['deposit'])} zł"),
+        ("rent", "Czynsz", o["rent"], f"{o['rent']} zł"),
+        ("floor_no", "Piętro", o["floor"], o["floor"]),
+        ("heating", "Ogrzewanie", "urban", "miejskie"),
+        ("construction_status", "Stan wykończenia", "ready_to_use", "do zamieszkania"),
+        ("free_from", "Dostępne od", "2025-07-01", "2025-07-01"),
+        ("advertiser_type", "Typ ogłoszeniodawcy", o["advertiser"], o["advertiser"]),
+        ("build_year", "Rok budowy", o["year"], str(o["year"])),
+        ("lift", "Winda", "y", "tak"),
+        ("building_type", "Rodzaj zabudowy", "block", "blok"),
+        ("building_material", "Materiał budynku", "brick", "cegła"),
+        ("windows_type", "Okna", "plastic", "plastikowe"),
+    ]
+    features = [
+        ("Wyposażenie", ["lodówka", "pralka", "meble"]),
+        ("Zabezpieczenia", ["domofon / wideofon"]),
+        ("Media", ["internet", "telewizja kablowa"]),
+        ("Informacje dodatkowe", ["balkon", "piwnica"]),
+        ("Bezpieczeństwo", ["brak informacji"]),
+    ]
+    name, _, number = (street or "").rpartition(" ")
+    ad = {
+        "id": o["id"], "title": o["title"],
+        "characteristics": [{"key": k, "label": label, "value": str(v), "localizedValue": text}
+                            for k, label, v, text in characteristics],
+        "featuresByCategory": [{"label": label, "values": values} for label, values in features],
+        "location": {"address": {
+            "street": {"name": name, "number": number} if street else None,
+            "district": {"name": district} if district else None,
+            "city": {"name": city}, "county": {"name": county}, "province": {"name": province},
+        }},
+    }
+    payload = json.dumps({"props": {"pageProps": {"ad": ad}}}, ensure_ascii=False)
+    return f'<script id="__NEXT_DATA__" type="application/json">{payload}</script>'
+
+
+def offer_page(i: int, next_data: bool = True) -> str:
+    o = offer(i)
+    return _template("oferta.html").substitute(
+        {**o, "price": _money(o["price"]), "deposit": _money(o["deposit"]),
+         "title_lower": o["title"].lower(), "next_data": _next_data(o) if next_data else ""})
+
+
+def search_page(page: int, pages: int = PAGES, per_page: int = PER_PAGE) -> str:
+    """Strona *page* wyników; za ostatnią stroną – strona bez ofert."""
+    card = _template("karta.html")
+    ids = range((page - 1) * per_page, page * per_page) if 1 <= page <= pages else range(0)
+    cards = []
+    for o in map(offer, ids):
+        cards.append(card.substitute({**o, "price": _money(o["price"]),
+                                      "price_m2": round(o["price"] / o["area"])}))
+    pagination = "".join(f'<li><a href="{SEARCH_PATH}?page={p}">{p}</a></li>' for p in range(1, pages + 1))
+    return _template("wyniki.html").substitute(total=pages * per_page, cards="\n".join(cards),
+                                                pagination=pagination)
+
+
+# ---------- lokalny zamiennik serwisu ----------
+class StandInServer:
+    """
+    Serwer HTTP na 127.0.0.1 udający otodom.pl: `SEARCH_PATH?page=N` – strony wyników,
+    `/pl/oferta/<slug>` – strony ofert. Każda odpowiedź jest opóźniana o *latency* ± *jitter*
+    sekund, a odsetek *error_rate* zapytań kończy się 503 z Retry-After (jak przy limitach
+    serwisu). Przy *rate_limit* serwer przepuszcza najwyżej tyle zapytań na sekundę (kubełek
+    na sekundę ruchu), a nadmiarowe odrzuca kodem 429 z Retry-After: 1 – do testów
+    AdaptiveLimiter. Używany jako kontekst: `with StandInServer(latency=0.05) as server: ...`.
+    """
+
+    def __init__(self, port: int = 0, pages: int = PAGES, per_page: int = PER_PAGE,
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float | None = None, seed: int = 0):
+        self.pages, self.per_page = pages, per_page
+        self.latency, self.jitter, self.error_rate = latency, jitter, error_rate
+        self.rate_limit = rate_limit
+        self._allowance, self._checked = rate_limit or 0.0, time.monotonic()
+        self.requests = self.errors = self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self) -> str:
+        return self.base_url + SEARCH_PATH
+
+    def offer_url(self, i: int) -> str:
+        return f"{self.base_url}/pl/oferta/{offer(i)['slug']}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive jak w prawdziwym serwisie
+            # nagłówki i treść w jednym pakiecie – bez opóźnień Nagle'a / delayed ACK
+            wbufsize = 1 << 16
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    delay = max(0.0, server.latency + server._rng.uniform(-server.jitter, server.jitter))
+                    failed = server._rng.random() < server.error_rate
+                    server.errors += failed
+                    limited = server._over_limit()
+                    server.throttled += limited
+                if limited:
+                    return self._send(429, b"Too Many Requests", {"Retry-After": "1"})
+                time.sleep(delay)
+                if failed:
+                    return self._send(503, b"Service Unavailable", {"Retry-After": "0"})
+                url = urlparse(self.path)
+                if url.path.rstrip("/") == SEARCH_PATH:
+                    page = int(parse_qs(url.query).get("page", ["1"])[0])
+                    return self._send(200, search_page(page, server.pages, server.per_page).encode())
+                if url.path.startswith("/pl/oferta/"):
+                    number = url.path.rsplit("-ID", 1)[-1]
+                    if number.isdigit():
+                        return self._send(200, offer_page(int(number)).encode())
+                self._send(404, b"Not Found")
+
+            def _send(self, status: int, body: bytes, headers: dict | None = None):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _over_limit(self) -> bool:
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        self._allowance = min(self.rate_limit, self._allowance + (now - self._checked) * self.rate_limit)
+        self._checked = now
+        if self._allowance < 1.0:
+            return True
+        self._allowance -= 1.0
+        return False
+
+    def __enter__(self) -> "StandInServer":
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+
+# ---------- pomiary ----------
+def measure(name: str, func, items: list, n: int | None = None, unit: str = "wywołań",
+            workers: int = 1) -> dict:
+    """
+    Wywołuje *func* dla każdego elementu *items* (w *workers* wątkach) i zwraca wynik:
+    przepustowość (*n* jednostek na sekundę, domyślnie liczba wywołań), mediana i 95. percentyl
+    czasu pojedynczego wywołania oraz liczba wywołań zakończonych wyjątkiem.
+    """
+    latencies: list[float] = []
+    errors: list[Exception] = []
+
+    def call(item):
+        start = time.perf_counter()
+        try:
+            func(item)
+        except Exception as e:
+            errors.append(e)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(call, items))
+    else:
+        for item in items:
+            call(item)
+    elapsed = time.perf_counter() - start
+
+    volume = len(items) if n is None else n * len(items)
+    ordered = sorted(latencies)
+    result = {
+        "nazwa": name, "n": len(items) if n is None else n, "jednostka": unit,
+        "czas_s": round(elapsed, 4), "przepustowość": round(volume / elapsed, 2),
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(ordered[round(0.95 * (len(ordered) - 1))] * 1000, 3),
+        "błędy": len(errors),
+    }
+    print(f"{name:<42} {result['n']:>10,} {result['przepustowość']:>14,.1f} {unit + '/s':<12}"
+          f" p50 {result['p50_ms']:>10.2f} ms  p95 {result['p95_ms']:>10.2f} ms"
+          + (f"  błędy: {len(errors)} ({errors[0]})" if errors else ""))
+    return result
+
+
+def bench_scraper(requests: int = REQUESTS, concurrency: int = main_otodom.CONCURRENCY,
+                  latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                  rate_limit: float | None = None) -> list[dict]:
+    """
+    Pobieranie i parsowanie stron z lokalnego zamiennika oraz parsowanie bez sieci. Z *rate_limit*
+    zamiennik odrzuca nadmiar zapytań (429), a pobieranie idzie przez AdaptiveLimiter.
+    """
+    results = []
+    pages = [(offer_page(i), f"https://www.otodom.pl/pl/oferta/{offer(i)['slug']}") for i in range(PARSES)]
+    results.append(measure("parse_html (__NEXT_DATA__)", lambda page: parse_html(*page), pages, unit="stron"))
+    results.append(measure("parse_html (DOM)", lambda page: parse_html(*page, use_next_data=False),
+                           pages, unit="stron"))
+    locations = [offer(i)["location"] for i in range(LOCATIONS)]
+    results.append(measure("parse_location", parse_location, locations))
+
+    # AdaptiveLimiter tylko przy symulowanym limicie serwisu – inaczej mierzyłby własny MAX_RATE
+    main_otodom.configure(cache=False, offline=False, adaptive=rate_limit is not None)
+    main_otodom.reset_limiter(concurrency)
+    main_otodom.reset_session(concurrency + 1)
+    with StandInServer(latency=latency, jitter=jitter, error_rate=error_rate, rate_limit=rate_limit) as server:
+        urls = [server.offer_url(i) for i in range(requests)]
+        results.append(measure("fetch_soup", main_otodom.fetch_soup, urls, unit="zapytań"))
+        results.append(measure(f"fetch_soup ({concurrency} wątków)", main_otodom.fetch_soup, urls,
+                               unit="zapytań", workers=concurrency))
+        results.append(measure(f"parse_listing ({concurrency} wątków)", main_otodom.parse_listing, urls,
+                               unit="ofert", workers=concurrency))
+        def listing_links(url):
+            with redirect_stdout(io.StringIO()):  # bez postępu "Zebrano … ogłoszeń" co stronę
+                main_otodom.get_listing_links(search_url=url)
+        results.append(measure("get_listing_links", listing_links, [server.search_url],
+                               n=server.pages * server.per_page, unit="linków"))
+        print(f"  zamiennik: {server.requests} zapytań, {server.errors} odpowiedzi 503, {server.throttled} odpowiedzi 429")
+        limiter = main_otodom.get_limiter()
+        if limiter is not None:
+            print(f"  tempo: {limiter.describe()}")
+    return results
+
+
+def check_resume_incremental(first: int = 50, second: int = 100) -> list[str]:
+    """
+    Sprawdzenie poprawności (nie pomiar): crawl przyrostowy z limitem *first*, potem wznowiony
+    crawl przyrostowy z limitem *second* na lokalnym zamienniku. Wynik musi mieć *second*
+    wierszy i same unikalne URL-e. Zwraca listę wykrytych problemów.
+    """
+    checkpoint_db, snapshot_db = main_otodom.CHECKPOINT_DB, main_otodom.SNAPSHOT_DB
+    with tempfile.TemporaryDirectory() as tmp, StandInServer() as server:
+        tmp = Path(tmp)
+        main_otodom.CHECKPOINT_DB, main_otodom.SNAPSHOT_DB = tmp / "checkpoint.db", tmp / "snapshot.db"
+        try:
+            with redirect_stdout(io.StringIO()):
+                main_otodom.run_crawl(tmp / "pierwszy.csv", first, incremental=True, search_url=server.search_url)
+                main_otodom.run_crawl(tmp / "wynik.csv", second, incremental=True, resume=True,
+                                      search_url=server.search_url)
+        finally:
+            main_otodom.CHECKPOINT_DB, main_otodom.SNAPSHOT_DB = checkpoint_db, snapshot_db
+        with open(tmp / "wynik.csv", encoding="utf-8-sig") as f:
+            urls = [row["url"] for row in csv.DictReader(f)]
+    problems = []
+    if len(urls) != second:
+        problems.append(f"wznowiony crawl przyrostowy: {len(urls)} wierszy zamiast {second}")
+    if len(set(urls)) != len(urls):
+        problems.append(f"wznowiony crawl przyrostowy: {len(urls) - len(set(urls))} powtórzonych URL-i")
+    print(f"{'wznowienie + crawl przyrostowy':<42} {len(urls):>10,} wierszy, {len(set(urls)):,} unikalnych URL-i")
+    return problems
+
+
+def dataset(rows: int, data_dir: Path = DATA_DIR) -> Path:
+    """Syntetyczna historia *rows* ofert (`bench_clean_otodom.make_csv`), generowana raz."""
+    path = data_dir / f"historia_{rows}.csv"
+    if not path.exists():
+        data_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        tmp = path.with_suffix(".tmp")
+        make_csv(tmp, rows)
+        tmp.replace(path)
+        print(f"  wygenerowano {path} ({time.perf_counter() - start:.1f} s)")
+    return path
+
+
+def _draw(plot):
+    def run(df):
+        fig = plot(df)
+        try:
+            fig.savefig(io.BytesIO(), format="png")
+        finally:
+            plt.close(fig)
+    return run
+
+
+PLOTS = {
+    "hist_rent": _draw(lambda df: hist_rent(df, show=False)),
+    "scatter_price_area": _draw(lambda df: scatter_price_area(df, show=False)),
+    "boxplot_city": _draw(lambda df: boxplot_city(df, show=False)),
+    "bar_price_by_rooms": _draw(lambda df: bar_price_by_rooms(df, show=False)),
+    "bar_count_by_rooms": _draw(lambda df: bar_count_by_rooms(df, show=False)),
+    "pie_advertiser_type": _draw(lambda df: pie_advertiser_type(df, show=False)),
+    "map_or_bar_avg_price": _draw(lambda df: map_or_bar_avg_price(df, show=False)),
+    "map_or_bar_avg_price_m2": _draw(lambda df: map_or_bar_avg_price_m2(df, show=False)),
+    "hist_rent_city": _draw(lambda df: hist_rent_city(df, "Warszawa", show=False)),
+}
+
+
+def bench_data(rows: int, data_dir: Path = DATA_DIR, repeat: int = REPEAT) -> list[dict]:
+    """`load_and_clean`, kostka agregatów, wykresy analiz i raportu na zbiorze *rows* wierszy."""
+    path = dataset(rows, data_dir)
+    runs = [path] * repeat
+    results = [measure("load_and_clean", lambda p: load_and_clean(p, cache=False), runs, rows, "wierszy")]
+    load_and_clean(path)  # zapis cache oczyszczonej ramki
+    results.append(measure("load_and_clean (cache)", load_and_clean, runs, rows, "wierszy"))
+
+    df = load_and_clean(path)
+    results.append(measure("AggregateCube", AggregateCube, [df] * repeat, rows, "wierszy"))
+    cube_for(df)  # kostka współdzielona przez wykresy – jak w analizach i raporcie
+    for name, plot in PLOTS.items():
+        results.append(measure(name, plot, [df] * repeat, rows, "wierszy"))
+    with tempfile.TemporaryDirectory() as tmp:
+        def report(frame):
+            for job in chart_jobs(frame, Path(tmp)):
+                _render(job)
+        results.append(measure("raport (report_otodom)", report, [df] * repeat, rows, "wierszy"))
+    return results
+
+
+def regressions(results: list[dict], baseline: list[dict], tolerance: float = TOLERANCE) -> list[str]:
+    """Pomiary, których przepustowość spadła o więcej niż *tolerance* względem *baseline*."""
+    before = {(r["nazwa"], r["n"]): r["przepustowość"] for r in baseline}
+    found = []
+    for result in results:
+        old = before.get((result["nazwa"], result["n"]))
+        new = result["przepustowość"]
+        if old and new is not None and new < old * (1 - tolerance):
+            found.append(f"{result['nazwa']} (n={result['n']:,}): {new:,.1f} zamiast {old:,.1f}"
+                         f" {result['jednostka']}/s ({new / old - 1:+.0%})")
+    return found
+
+
+def main(args: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", nargs="+", choices=("scraper", "dane", "poprawność"),
+                        default=["scraper", "dane", "poprawność"])
+    parser.add_argument("--rows", nargs="+", type=int, default=ROW_COUNTS, help="rozmiary zbiorów danych")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="powtórzeń pomiarów na zbiorach")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR, help="katalog na wygenerowane zbiory")
+    parser.add_argument("--requests", type=int, default=REQUESTS, help="zapytań o oferty do zamiennika")
+    parser.add_argument("--concurrency", type=int, default=main_otodom.CONCURRENCY)
+    parser.add_argument("--latency", type=float, default=0.0, help="opóźnienie odpowiedzi zamiennika [s]")
+    parser.add_argument("--jitter", type=float, default=0.0, help="losowy rozrzut opóźnienia ± [s]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="odsetek odpowiedzi 503 (0–1)")
+    parser.add_argument("--rate-limit", type=float, help="limit zapytań/s zamiennika (nadmiar → 429)")
+    parser.add_argument("--save", type=Path, help="zapisz wyniki do pliku JSON")
+    parser.add_argument("--baseline", type=Path, help="porównaj z wcześniej zapisanymi wynikami")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="dopuszczalny spadek przepustowości")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="tylko uruchom zamiennik serwisu na porcie")
+    options = parser.parse_args(args)
+
+    if options.serve is not None:
+        server = StandInServer(options.serve, latency=options.latency, jitter=options.jitter,
+                               error_rate=options.error_rate, rate_limit=options.rate_limit)
+        print(f"▶ Zamiennik otodom.pl: {server.search_url} (Ctrl+C kończy)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    results, problems = [], []
+    if "poprawność" in options.suite:
+        print("▶ Poprawność crawla (lokalny zamiennik serwisu)")
+        problems += check_resume_incremental()
+    if "scraper" in options.suite:
+        print("▶ Scraper (lokalny zamiennik serwisu)")
+        results += bench_scraper(options.requests, options.concurrency, options.latency,
+                                 options.jitter, options.error_rate, options.rate_limit)
+    if "dane" in options.suite:
+        for rows in options.rows:
+            print(f"▶ Dane: {rows:,} wierszy")
+            results += bench_data(rows, options.data_dir, options.repeat)
+
+    if options.save:
+        options.save.write_text(json.dumps(results, ensure_ascii=False, indent=1), encoding="utf-8")
+        print(f"✅ Zapisano wyniki do '{options.save}'")
+    for line in problems:
+        print(f"❌ Błąd: {line}")
+    if options.baseline:
+        found = regressions(results, json.loads(options.baseline.read_text(encoding="utf-8")), options.tolerance)
+        for line in found:
+            print(f"❌ Regresja: {line}")
+        if found:
+            return 1
+        print(f"✅ Brak regresji względem '{options.baseline}'")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# cache_otodom.py
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from threading import Lock
+
+from requests import Session
+
+CACHE_DIR       = Path("http_cache")
+CACHE_FRESH     = 0                  # s – młodszy wpis jest zwracany bez pytania serwera (0 = zawsze rewalidacja)
+CACHE_MAX_AGE   = 30 * 24 * 3600     # s – wpisy nierewalidowane dłużej są usuwane
+CACHE_MAX_BYTES = 2 * 1024 ** 3      # limit rozmiaru skompresowanych stron – nadmiar usuwany od najdawniej używanych
+
+
+class CacheMiss(LookupError):
+    """Brak strony w cache w trybie offline."""
+
+
+class ResponseCache:
+    """
+    Dyskowy cache odpowiedzi HTTP. Treść strony zapisywana jest skompresowana (zlib) w pliku
+    nazwanym skrótem SHA-256 treści (identyczne strony zajmują miejsce raz), a indeks
+    SQLite mapuje URL → skrót, ETag, Last-Modified i czasy pobrania/użycia.
+
+    Nieświeży wpis jest rewalidowany zapytaniem warunkowym (If-None-Match / If-Modified-Since);
+    odpowiedź 304 zwraca treść z dysku bez ponownego pobierania. W trybie *offline* strony
+    czytane są wyłącznie z cache (brak wpisu → `CacheMiss`), bez żadnego ruchu sieciowego.
+    """
+
+    def __init__(self, directory: Path | str = CACHE_DIR, fresh: float = CACHE_FRESH,
+                 max_age: float = CACHE_MAX_AGE, max_bytes: int = CACHE_MAX_BYTES, offline: bool = False):
+        self.directory = Path(directory)
+        self.fresh = fresh
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.directory / "index.sqlite", check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    url           TEXT PRIMARY KEY,
+                    digest        TEXT NOT NULL,
+                    size          INTEGER NOT NULL,
+                    etag          TEXT,
+                    last_modified TEXT,
+                    validated_at  REAL NOT NULL,
+                    used_at       REAL NOT NULL
+                )""")
+        if not offline:
+            self.evict()
+
+    # ---------- odczyt / zapis ----------
+    def _blob_path(self, digest: str) -> Path:
+        return self.directory / digest[:2] / f"{digest}.html.z"
+
+    def _lookup(self, url: str) -> tuple | None:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT digest, etag, last_modified, validated_at FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+
+    def _read(self, url: str, digest: str, validated: bool = False) -> str:
+        html = zlib.decompress(self._blob_path(digest).read_bytes()).decode("utf-8")
+        now = time.time()
+        with self._lock, self._conn:
+            if validated:
+                self._conn.execute("UPDATE responses SET validated_at = ?, used_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE responses SET used_at = ? WHERE url = ?", (now, url))
+        return html
+
+    def store(self, url: str, html: str, etag: str | None = None, last_modified: str | None = None):
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            # własny plik tymczasowy każdego zapisu, potem atomowa zamiana – równoległe wątki
+            # mogą zapisywać tę samą treść
+            fd, tmp = tempfile.mkstemp(suffix=".tmp", dir=path.parent)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(zlib.compress(data, 6))
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, path.stat().st_size, etag, last_modified, now, now),
+            )
+
+    def get(self, url: str) -> str | None:
+        """Treść strony z cache (bez rewalidacji) albo None."""
+        entry = self._lookup(url)
+        if entry is None or not self._blob_path(entry[0]).exists():
+            return None
+        return self._read(url, entry[0])
+
+    def fetch(self, session: Session, url: str, timeout: float) -> str:
+        """Zwraca treść strony z cache lub z sieci, rewalidując nieświeże wpisy."""
+        entry = self._lookup(url)
+        if entry is not None and not self._blob_path(entry[0]).exists():
+            entry = None  # plik usunięty ręcznie – traktujemy jak brak wpisu
+        if self.offline:
+            if entry is None:
+                raise CacheMiss(f"Brak strony w cache: {url}")
+            return self._read(url, entry[0])
+
+        headers = {}
+        if entry is not None:
+            digest, etag, last_modified, validated_at = entry
+            if time.time() - validated_at < self.fresh:
+                return self._read(url, digest)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        r = session.get(url, headers=headers, timeout=timeout)
+        if r.status_code == 304 and entry is not None:
+            return self._read(url, entry[0], validated=True)
+        r.raise_for_status()
+        self.store(url, r.text, r.headers.get("ETag"), r.headers.get("Last-Modified"))
+        return r.text
+
+    # ---------- porządki ----------
+    def evict(self):
+        """Usuwa wpisy starsze niż *max_age*, a potem najdawniej używane ponad limit *max_bytes*."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses WHERE validated_at < ?", (time.time() - self.max_age,))
+            total = 0
+            for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY used_at DESC").fetchall():
+                total += size
+                if total > self.max_bytes:
+                    self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+            referenced = {digest for (digest,) in self._conn.execute("SELECT DISTINCT digest FROM responses")}
+        for path in self.directory.glob("*/*.html.z"):
+            if path.name.removesuffix(".html.z") not in referenced:
+                path.unlink(missing_ok=True)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,106 @@
+# checkpoint_otodom.py
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Iterable, Iterator
+
+CHECKPOINT_DB = Path("otodom_crawl.sqlite")
+
+PENDING, DONE, FAILED = "pending", "done", "failed"
+
+
+class CheckpointStore:
+    """
+    Trwały zapis postępu crawla w SQLite (tryb WAL): znalezione linki, ich status
+    (pending / done / failed) oraz sparsowane wiersze – zapisywane od razu po pobraniu.
+    Po awarii lub przerwaniu ponowne uruchomienie z `resume=True` pomija pobrane już oferty
+    i ponawia te, które się nie udały. Bez `resume` zaczynamy od pustej bazy.
+    """
+
+    def __init__(self, path: Path | str = CHECKPOINT_DB, resume: bool = False):
+        self.path = Path(path)
+        self._lock = Lock()  # jedno połączenie współdzielone przez wątki workerów
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            if not resume:
+                self._conn.execute("DROP TABLE IF EXISTS listings")
+            # rowid wyznacza kolejność znalezienia linku, a więc i kolejność wierszy w wyniku
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS listings (
+                    url        TEXT PRIMARY KEY,
+                    status     TEXT NOT NULL,
+                    row        TEXT,
+                    error      TEXT,
+                    attempts   INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL
+                )""")
+
+    def _execute(self, sql: str, params: tuple = ()) -> sqlite3.Cursor:
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params)
+
+    def add_url(self, url: str) -> bool:
+        """Rejestruje znaleziony link. Zwraca True, jeśli link jest nowy."""
+        cursor = self._execute(
+            "INSERT OR IGNORE INTO listings (url, status, updated_at) VALUES (?, ?, ?)",
+            (url, PENDING, _now()),
+        )
+        return cursor.rowcount == 1
+
+    def add_urls(self, urls: Iterable[str]):
+        for url in urls:
+            self.add_url(url)
+
+    def mark_done(self, url: str, row: dict):
+        self._execute(
+            "UPDATE listings SET status = ?, row = ?, error = NULL, attempts = attempts + 1, updated_at = ? "
+            "WHERE url = ?",
+            (DONE, json.dumps(row, ensure_ascii=False), _now(), url),
+        )
+
+    def mark_failed(self, url: str, error: str):
+        self._execute(
+            "UPDATE listings SET status = ?, error = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?",
+            (FAILED, error, _now(), url),
+        )
+
+    def pending_urls(self) -> list[str]:
+        """Linki do (ponownego) pobrania: jeszcze nieodwiedzone i zakończone błędem."""
+        with self._lock:
+            cursor = self._conn.execute("SELECT url FROM listings WHERE status != ? ORDER BY rowid", (DONE,))
+            return [url for (url,) in cursor]
+
+    def is_done(self, url: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute("SELECT 1 FROM listings WHERE url = ? AND status = ?", (url, DONE))
+            return cursor.fetchone() is not None
+
+    def rows(self, batch_size: int = 1000) -> Iterator[dict]:
+        """Wszystkie pobrane wiersze w kolejności znalezienia linków."""
+        last = 0
+        while True:
+            with self._lock:
+                batch = self._conn.execute(
+                    "SELECT rowid, row FROM listings WHERE status = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                    (DONE, last, batch_size),
+                ).fetchall()
+            if not batch:
+                return
+            for last, row in batch:
+                yield json.loads(row)
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM listings GROUP BY status").fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
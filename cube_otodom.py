@@ -0,0 +1,97 @@
+# cube_otodom.py
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Najdrobniejsza komórka kostki – z niej zwijane są wszystkie poziomy
+CELL_KEYS = ["województwo", "miasto", "dzielnica", "pokoje_num"]
+LEVELS = {
+    "województwo": ["województwo"],
+    "miasto": ["miasto"],
+    "dzielnica": ["miasto", "dzielnica"],
+    "pokoje": ["pokoje_num"],
+}
+
+
+class AggregateCube:
+    """
+    Zagregowane statystyki ofert liczone raz dla oczyszczonej ramki (`load_and_clean`):
+    jedno grupowanie do komórek województwo × miasto × dzielnica × liczba pokoi (liczby
+    i sumy), z których zwijane są poziomy z `LEVELS`. Mediany i wiersze poszczególnych miast
+    liczone są przy pierwszym użyciu i zapamiętywane. Wykresy i raporty czytają stąd
+    zamiast grupować lub filtrować całą ramkę osobno.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = weakref.ref(df)  # kostka w `cube_for` nie może trzymać ramki przy życiu
+        keys = [key for key in CELL_KEYS if key in df.columns]
+        values = df[keys].assign(
+            _cena=df["miesięcznie_num"],
+            _cena_m2=df["cena_m2"],
+        )
+        self.cells = values.groupby(keys, dropna=False, sort=False).agg(
+            liczba_ogłoszeń=("_cena", "size"),
+            liczba_cen=("_cena", "count"),
+            suma_cen=("_cena", "sum"),
+            liczba_cen_m2=("_cena_m2", "count"),
+            suma_cen_m2=("_cena_m2", "sum"),
+        )
+        self._stats: dict[str, pd.DataFrame] = {}
+        self._city_rows: dict[str, np.ndarray] | None = None
+
+    @property
+    def df(self) -> pd.DataFrame:
+        df = self._df()
+        if df is None:
+            raise ReferenceError("Ramka, dla której zbudowano kostkę, już nie istnieje")
+        return df
+
+    def stats(self, level: str) -> pd.DataFrame:
+        """
+        Tabela dla poziomu z `LEVELS` (indeks – klucze poziomu, bez pustych): liczba_ogłoszeń,
+        liczba_cen_m2, średnia_cena, średnia_cena_m2, mediana_cena, mediana_cena_m2.
+        """
+        if level not in self._stats:
+            keys = LEVELS[level]
+            rolled = self.cells.groupby(level=keys).sum()
+            medians = self.df.groupby(keys)[["miesięcznie_num", "cena_m2"]].median()
+            self._stats[level] = pd.DataFrame({
+                "liczba_ogłoszeń": rolled["liczba_ogłoszeń"],
+                "liczba_cen_m2": rolled["liczba_cen_m2"],
+                "średnia_cena": rolled["suma_cen"] / rolled["liczba_cen"].replace(0, np.nan),
+                "średnia_cena_m2": rolled["suma_cen_m2"] / rolled["liczba_cen_m2"].replace(0, np.nan),
+                "mediana_cena": medians["miesięcznie_num"],
+                "mediana_cena_m2": medians["cena_m2"],
+            })
+        return self._stats[level]
+
+    def city_rows(self, city: str, case: bool = True) -> pd.DataFrame:
+        """Wiersze ofert z miasta – bez przeszukiwania całej ramki (pozycje zapamiętane raz)."""
+        if self._city_rows is None:
+            self._city_rows = self.df.groupby("miasto", sort=False).indices
+        if case:
+            positions = self._city_rows.get(city, np.empty(0, dtype="intp"))
+        else:
+            matching = [rows for name, rows in self._city_rows.items() if name.lower() == city.lower()]
+            positions = np.sort(np.concatenate(matching)) if matching else np.empty(0, dtype="intp")
+        return self.df.iloc[positions]
+
+
+_cubes: dict[int, tuple[weakref.ref, AggregateCube]] = {}
+
+
+def cube_for(df: pd.DataFrame) -> AggregateCube:
+    """
+    Kostka dla ramki *df*, budowana przy pierwszym wywołaniu i potem współdzielona przez
+    wszystkie wykresy. Ramki nie należy później modyfikować (kostka by tego nie zauważyła).
+    """
+    key = id(df)
+    cached = _cubes.get(key)
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+    for stale in [k for k, (ref, _) in _cubes.items() if ref() is None]:
+        del _cubes[stale]
+    cube = AggregateCube(df)
+    _cubes[key] = (weakref.ref(df), cube)
+    return cube
@@ -0,0 +1,267 @@
+# dedup_otodom.py
+"""
+Wykrywanie duplikatów ofert – to samo mieszkanie wystawione pod różnymi adresami URL
+(np. przez kilka biur). Każda oferta dostaje zbiór cech: słowa tytułu, zaokrągloną
+powierzchnię, liczbę pokoi, piętro, dzielnicę i ulicę (z `parse_location`). Zbiory są
+skracane do podpisów MinHash, a kandydaci na duplikaty szukani przez LSH (pasma podpisu)
+w obrębie miasta – w czasie liniowym, bez porównywania każdej pary. Kandydat jest
+potwierdzany, gdy podpisy są podobne, powierzchnia i cena prawie te same, a znane pokoje,
+piętro, dzielnica i ulica się nie wykluczają; potwierdzone pary łączone są w klastry.
+
+Kolumna `klaster` to pozycja (0..n-1) pierwszej oferty klastra; oferta bez duplikatów
+jest swoim własnym klastrem. `collapse_duplicates` zostawia po jednej ofercie z klastra.
+
+    python dedup_otodom.py otodom_wynajem.csv -o otodom_wynajem_klastry.csv
+"""
+import argparse
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analytics_otodom import rooms_number, to_number
+from location_otodom import normalize_locations
+
+CLUSTER_COLUMN = "klaster"
+# Kolumny wyniku crawla, z których budowane są cechy oferty
+DEDUP_COLUMNS = ["tytuł", "miesięcznie", "powierzchnia", "liczba pokoi", "piętro", "lokalizacja", "miasto", "dzielnica", "ulica"]
+# Atrybuty, których różne (znane) wartości wykluczają duplikat
+CONFLICTS = ["pok", "piętro", "dzielnica", "ulica"]
+MISSING = "brak informacji"
+PERMUTATIONS = 64        # długość podpisu MinHash
+BANDS = 16               # pasma LSH po PERMUTATIONS // BANDS wartości – próg podobieństwa ~ (1/16)^(1/4) ≈ 0.5
+WINDOW = 3               # sąsiedzi (po powierzchni) w grupie LSH, z którymi parowana jest oferta
+SIMILARITY = 0.5         # minimalne (szacowane) podobieństwo Jaccarda cech potwierdzające duplikat
+AREA_TOLERANCE = 0.02    # względna różnica powierzchni dopuszczalna w duplikacie
+PRICE_TOLERANCE = 0.05   # względna różnica ceny miesięcznej dopuszczalna w duplikacie
+MIN_WORD = 3             # krótsze słowa tytułu są pomijane ("z", "na", "ul")
+SEED = 20250601
+
+_PRIME = (1 << 31) - 1   # a·h + b dla h, a, b < 2^31 mieści się w uint64
+
+
+def _text(s: pd.Series) -> pd.Series:
+    """Tekst małymi literami bez znaków interpunkcyjnych; braki jako ""."""
+    s = s.astype("str").where(s.notna() & (s != MISSING), "")
+    return s.str.lower().str.replace(r"[^0-9a-ząćęłńóśźż]+", " ", regex=True).str.strip()
+
+
+def attributes(df: pd.DataFrame, location: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Atrybuty ofert jako tekst (po jednej kolumnie, indeks 0..n-1, braki jako ""): powierzchnia
+    zaokrąglona w dół i do najbliższego m² – 47,4 i 47,6 m² mają wspólne "47" w `m2+` – liczba
+    pokoi, piętro, dzielnica i ulica. *location* – miasto/dzielnica/ulica, jeśli już wyliczone.
+    """
+    location = _location(df) if location is None else location
+    area = pd.Series(_area(df))
+    columns = {
+        "m2": np.floor(area).astype("Int64"),
+        "m2+": np.floor(area + 0.5).astype("Int64"),
+        "pok": pd.Series(_rooms(df)).astype("Int64"),
+        "piętro": _text(df["piętro"]) if "piętro" in df.columns else pd.Series("", index=range(len(df))),
+        "dzielnica": _text(location["dzielnica"]),
+        "ulica": _text(location["ulica"]),
+    }
+    result = pd.DataFrame({name: pd.Series(values.to_numpy(), dtype="str") for name, values in columns.items()})
+    return result.where(result.notna() & (result != "<NA>"), "")
+
+
+def offer_features(df: pd.DataFrame, attrs: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cechy ofert w postaci długiej: kolumna `wiersz` (pozycja oferty) i `cecha` (tekst), np.
+    (0, "t:przestronne"), (0, "m2:48"), (0, "pok:2"), (0, "ulica:długa 5") – słowa tytułu
+    i atrybuty (*attrs* z `attributes`).
+    """
+    parts = []
+    if "tytuł" in df.columns:
+        words = _text(df["tytuł"]).reset_index(drop=True).str.split().explode()
+        words = words[words.str.len() >= MIN_WORD]
+        parts.append(pd.DataFrame({"wiersz": words.index.to_numpy(), "cecha": "t:" + words.to_numpy()}))
+    for name, values in attrs.items():
+        values = values[values != ""]
+        parts.append(pd.DataFrame({"wiersz": values.index.to_numpy(), "cecha": f"{name}:" + values.to_numpy()}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _location(df: pd.DataFrame) -> pd.DataFrame:
+    """Miasto, dzielnica i ulica – z kolumn wyniku crawla albo z kolumny lokalizacji."""
+    if {"miasto", "dzielnica", "ulica"} <= set(df.columns):
+        return pd.DataFrame({col: df[col].to_numpy() for col in ("miasto", "dzielnica", "ulica")})
+    if "lokalizacja" in df.columns:
+        parsed = normalize_locations(df["lokalizacja"])
+        return pd.DataFrame({col: parsed[col].to_numpy() for col in ("miasto", "dzielnica", "ulica")})
+    empty = np.full(len(df), MISSING, dtype=object)
+    return pd.DataFrame({"miasto": df["miasto"].to_numpy() if "miasto" in df.columns else empty,
+                         "dzielnica": empty, "ulica": empty})
+
+
+def _area(df: pd.DataFrame) -> np.ndarray:
+    if "powierzchnia_num" in df.columns:
+        return df["powierzchnia_num"].to_numpy(dtype="float64")
+    if "powierzchnia" in df.columns:
+        return to_number(df["powierzchnia"]).to_numpy(dtype="float64")
+    return np.full(len(df), np.nan)
+
+
+def _price(df: pd.DataFrame) -> np.ndarray:
+    if "miesięcznie_num" in df.columns:
+        return df["miesięcznie_num"].to_numpy(dtype="float64")
+    if "miesięcznie" in df.columns:
+        return to_number(df["miesięcznie"]).to_numpy(dtype="float64")
+    return np.full(len(df), np.nan)
+
+
+def _rooms(df: pd.DataFrame) -> np.ndarray:
+    if "pokoje_num" in df.columns:
+        return df["pokoje_num"].to_numpy(dtype="float64")
+    if "liczba pokoi" in df.columns:
+        return rooms_number(df["liczba pokoi"]).to_numpy(dtype="float64")
+    return np.full(len(df), np.nan)
+
+
+def minhash(rows: np.ndarray, features: pd.Series, n: int, permutations: int = PERMUTATIONS,
+            seed: int = SEED) -> np.ndarray:
+    """
+    Podpisy MinHash (n × *permutations*, uint16) zbiorów cech: dla każdej z *permutations*
+    funkcji h(x) = (a·crc32(x) + b) mod p minimum po cechach oferty. Każda unikalna cecha
+    jest haszowana raz. Oferta bez cech dostaje podpis niepasujący do żadnego innego.
+    """
+    codes, uniques = pd.factorize(features)
+    hashes = np.fromiter((zlib.crc32(str(u).encode()) % _PRIME for u in uniques), dtype="uint64",
+                         count=len(uniques))[codes]
+    order = np.argsort(rows, kind="stable")
+    rows, hashes = rows[order], hashes[order]
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.empty(0, dtype="intp")
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _PRIME, permutations, dtype="uint64")
+    b = rng.integers(0, _PRIME, permutations, dtype="uint64")
+    # bez cech: losowy podpis – praktycznie nie pokrywa się z innymi
+    signatures = rng.integers(0, 1 << 16, (n, permutations), dtype="uint16")
+    for k in range(permutations):
+        values = (a[k] * hashes + b[k]) % _PRIME
+        # 16 bitów minimum wystarcza – przypadkowa zgodność ma szansę 1/65536
+        signatures[rows[starts], k] = np.minimum.reduceat(values, starts).astype("uint16") if len(starts) else 0
+    return signatures
+
+
+def candidate_pairs(signatures: np.ndarray, block: np.ndarray, sort_key: np.ndarray,
+                    bands: int = BANDS, window: int = WINDOW) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pary (u, v) ofert z tym samym pasmem podpisu i tym samym kluczem bloku (miastem). Grupa
+    o wspólnym paśmie bywa duża (typowe tytuły), więc zamiast wszystkich par jej członkowie,
+    posortowani według *sort_key* (powierzchni), są parowani z *window* poprzednikami –
+    liczba par jest liniowa.
+    """
+    n, permutations = signatures.shape
+    width = permutations // bands
+    us, vs = [], []
+    for band in range(bands):
+        chunk = np.ascontiguousarray(signatures[:, band * width:(band + 1) * width])
+        if chunk.itemsize * width == 8:
+            band_codes = chunk.view("uint64").ravel()  # 4 × uint16 jako jedna liczba
+        else:
+            band_codes = np.unique(chunk, axis=0, return_inverse=True)[1].ravel()
+        order = np.lexsort((sort_key, band_codes, block))
+        group = np.r_[True, (band_codes[order][1:] != band_codes[order][:-1])
+                      | (block[order][1:] != block[order][:-1])].cumsum()
+        for lag in range(1, window + 1):
+            same = np.flatnonzero(group[lag:] == group[:-lag]) + lag
+            us.append(order[same - lag])
+            vs.append(order[same])
+    if not us:
+        return np.empty(0, dtype="intp"), np.empty(0, dtype="intp")
+    u, v = np.concatenate(us).astype("int64"), np.concatenate(vs).astype("int64")
+    pairs = pd.unique(np.minimum(u, v) * n + np.maximum(u, v))  # ta sama para z wielu pasm
+    return pairs // n, pairs % n
+
+
+def _close(values: np.ndarray, u: np.ndarray, v: np.ndarray, tolerance: float) -> np.ndarray:
+    """Czy wartości par różnią się względnie najwyżej o *tolerance* (brak jednej – nie wyklucza)."""
+    a, b = values[u], values[v]
+    with np.errstate(invalid="ignore"):
+        close = np.abs(a - b) <= tolerance * np.fmax(a, b)
+    return close | np.isnan(a) | np.isnan(b)
+
+
+def confirm(u: np.ndarray, v: np.ndarray, signatures: np.ndarray, area: np.ndarray, price: np.ndarray,
+            conflicts: np.ndarray, similarity: float = SIMILARITY) -> np.ndarray:
+    """
+    Maska par potwierdzonych: podobne podpisy, powierzchnia różna najwyżej o `AREA_TOLERANCE`,
+    cena najwyżej o `PRICE_TOLERANCE` i żadnej sprzeczności w atrybutach *conflicts* (kody;
+    -1 – brak, nie jest sprzecznością).
+    """
+    similar = (signatures[u] == signatures[v]).mean(axis=1) >= similarity
+    a, b = conflicts[u], conflicts[v]
+    consistent = ((a < 0) | (b < 0) | (a == b)).all(axis=1)
+    return (similar & consistent & _close(area, u, v, AREA_TOLERANCE)
+            & _close(price, u, v, PRICE_TOLERANCE))
+
+
+def connected_components(n: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Dla każdego wierzchołka najmniejszy numer w jego spójnej składowej (propagacja etykiet)."""
+    labels = np.arange(n)
+    while len(u):
+        smaller = np.minimum(labels[u], labels[v])
+        updated = labels.copy()
+        np.minimum.at(updated, u, smaller)
+        np.minimum.at(updated, v, smaller)
+        updated = updated[updated]  # skok wskaźnika – skraca łańcuchy etykiet
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    return labels
+
+
+def find_duplicates(df: pd.DataFrame) -> pd.Series:
+    """
+    Numer klastra (kolumna `klaster`) dla każdej oferty *df* – pozycja pierwszej oferty
+    klastra. Wystarczą kolumny wyniku crawla (`DEDUP_COLUMNS`) albo ramka z `load_and_clean`.
+    """
+    n = len(df)
+    if n == 0:
+        return pd.Series(np.empty(0, dtype="int64"), index=df.index, name=CLUSTER_COLUMN)
+    location = _location(df)
+    attrs = attributes(df, location)
+    features = offer_features(df, attrs)
+    signatures = minhash(features["wiersz"].to_numpy(dtype="int64"), features["cecha"], n)
+    block = pd.factorize(_text(location["miasto"]))[0]
+    area = _area(df)
+    u, v = candidate_pairs(signatures, block, np.nan_to_num(area))
+    # sprzeczne atrybuty (różne piętro czy ulica) wykluczają duplikat, brak jednego z nich – nie
+    conflicts = np.column_stack([pd.factorize(attrs[col].replace("", None))[0] for col in CONFLICTS])
+    keep = confirm(u, v, signatures, area, _price(df), conflicts)
+    labels = connected_components(n, u[keep], v[keep])
+    return pd.Series(labels, index=df.index, name=CLUSTER_COLUMN)
+
+
+def add_clusters(df: pd.DataFrame) -> pd.DataFrame:
+    """Kopia *df* z kolumną `klaster`."""
+    return df.assign(**{CLUSTER_COLUMN: find_duplicates(df).to_numpy()})
+
+
+def collapse_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+    """Po jednej ofercie (pierwszej) z każdego klastra; klastry liczone, jeśli ramka ich nie ma."""
+    clusters = df[CLUSTER_COLUMN] if CLUSTER_COLUMN in df.columns else find_duplicates(df)
+    return df[clusters.to_numpy() == np.arange(len(df))]
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", type=Path, help="plik CSV z wynikiem crawla")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="plik wynikowy z kolumną 'klaster'")
+    parser.add_argument("--collapse", action="store_true", help="zapisz tylko jedną ofertę z każdego klastra")
+    options = parser.parse_args(args)
+
+    df = pd.read_csv(options.csv, dtype="str", keep_default_na=False, encoding="utf-8-sig")
+    df = add_clusters(df)
+    clusters = df[CLUSTER_COLUMN].nunique()
+    print(f"✔ {len(df)} ofert w {clusters} klastrach – {len(df) - clusters} duplikatów "
+          f"({(len(df) - clusters) / max(len(df), 1):.1%})")
+    (collapse_duplicates(df) if options.collapse else df).to_csv(options.output, index=False, encoding="utf-8-sig")
+    print(f"✅ Zapisano '{options.output}'")
+
+
+if __name__ == "__main__":
+    main()
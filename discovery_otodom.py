@@ -0,0 +1,89 @@
+# discovery_otodom.py
+import json
+import unicodedata
+from dataclasses import dataclass, replace
+from pathlib import Path
+from urllib.parse import urlencode
+
+VOIVODESHIPS_JSON = Path(__file__).with_name("poland.voivodeships.json")
+
+# Początkowe przedziały ceny [PLN/mies.] dla każdego województwa; ostatni jest otwarty
+PRICE_BANDS = (0, 1500, 2000, 2500, 3000, 4000, 6000)
+MIN_PRICE_WIDTH = 100   # węższych przedziałów ceny już nie dzielimy – dzielimy po powierzchni
+AREA_SPLIT_FROM = 60    # pierwszy podział powierzchni [m²]: do 60 / od 60
+MIN_AREA_WIDTH = 5
+
+
+def region_slug(name: str) -> str:
+    """Nazwa województwa → segment adresu Otodom, np. 'KUJAWSKO-POMORSKIE' → 'kujawsko--pomorskie'."""
+    name = name.lower().replace("ł", "l")
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return ascii_name.replace("-", "--")
+
+
+def load_voivodeships(path: Path | str = VOIVODESHIPS_JSON) -> list[str]:
+    """Nazwy województw z dołączonego pliku GeoJSON."""
+    with open(path, encoding="utf-8") as f:
+        return [feature["properties"]["name"] for feature in json.load(f)["features"]]
+
+
+@dataclass(frozen=True)
+class SearchSlice:
+    """
+    Niezależny wycinek wyszukiwania: województwo oraz przedziały ceny i powierzchni
+    (granice włącznie, None = bez ograniczenia). Każdy wycinek ma własną, płytką paginację.
+    Sąsiednie wycinki mają wspólną granicę (np. do 60 m² i od 60 m²) – ceny i powierzchnie
+    nie są całkowite (59,4 m² nie pasuje ani do "do 59", ani do "od 60"), a oferty
+    z granicy odsiewa globalna deduplikacja linków.
+    """
+    region: str | None = None
+    price_min: int = 0
+    price_max: int | None = None
+    area_min: int = 0
+    area_max: int | None = None
+
+    def url(self, search_url: str, page: int = 1) -> str:
+        base = f"{search_url}/{self.region}" if self.region else search_url
+        params = {}
+        if self.price_min:
+            params["priceMin"] = self.price_min
+        if self.price_max is not None:
+            params["priceMax"] = self.price_max
+        if self.area_min:
+            params["areaMin"] = self.area_min
+        if self.area_max is not None:
+            params["areaMax"] = self.area_max
+        if page > 1:
+            params["page"] = page
+        return f"{base}?{urlencode(params)}" if params else base
+
+    def split(self) -> list["SearchSlice"]:
+        """
+        Dzieli zbyt duży wycinek na dwa: najpierw po cenie, a gdy przedział ceny jest już
+        wąski – po powierzchni. Zwraca pustą listę, jeśli dalszy podział nie jest możliwy.
+        """
+        if self.price_max is None:
+            mid = max(self.price_min * 2, PRICE_BANDS[1])
+            return [replace(self, price_max=mid), replace(self, price_min=mid)]
+        if self.price_max - self.price_min >= 2 * MIN_PRICE_WIDTH:
+            mid = (self.price_min + self.price_max + 1) // 2
+            return [replace(self, price_max=mid), replace(self, price_min=mid)]
+        if self.area_max is None:
+            mid = max(self.area_min * 2, AREA_SPLIT_FROM)
+            return [replace(self, area_max=mid), replace(self, area_min=mid)]
+        if self.area_max - self.area_min >= 2 * MIN_AREA_WIDTH:
+            mid = (self.area_min + self.area_max + 1) // 2
+            return [replace(self, area_max=mid), replace(self, area_min=mid)]
+        return []
+
+
+def plan_slices(voivodeships: list[str] | None = None) -> list[SearchSlice]:
+    """Początkowy plan: każde województwo × przedziały ceny z `PRICE_BANDS`."""
+    if voivodeships is None:
+        voivodeships = load_voivodeships()
+    bounds = [*PRICE_BANDS, None]
+    return [
+        SearchSlice(region_slug(name), low, high)
+        for name in voivodeships
+        for low, high in zip(bounds, bounds[1:])
+    ]
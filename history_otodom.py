@@ -0,0 +1,160 @@
+# history_otodom.py
+"""
+Historia ofert ze wszystkich crawli: zbiór Parquet partycjonowany po dniu pobrania
+i województwie (`historia/data=2025-06-01/województwo=mazowieckie/part-….parquet`).
+Każdy crawl tylko dopisuje nowe pliki; oferta (`url`) występuje najwyżej raz dziennie.
+Zapytania (`query`, `price_trend`) czytają wyłącznie pasujące partycje i grupy wierszy.
+
+    python history_otodom.py append otodom_wynajem.csv
+    python history_otodom.py trend --freq M --by województwo --since 2025-01-01
+"""
+import argparse
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from analytics_otodom import to_number
+from writer_otodom import POLISH_COLUMNS, read_partition
+
+HISTORY_DIR = Path("historia")
+PARTITION_KEYS = ["data", "województwo"]
+# Kolumny liczbowe dopisywane przy zapisie – filtry na nich korzystają ze statystyk Parquet
+NUMERIC = {"cena": "miesięcznie", "powierzchnia_m2": "powierzchnia"}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("Historia ofert wymaga biblioteki pyarrow (pip install pyarrow)") from e
+    return pa, ds
+
+
+def history_schema():
+    pa, _ = _require_pyarrow()
+    fields = [(name, pa.string()) for name in POLISH_COLUMNS.values() if name not in PARTITION_KEYS]
+    fields += [(name, pa.float64()) for name in NUMERIC] + [("cena_m2", pa.float64())]
+    return pa.schema(fields + [(key, pa.string()) for key in PARTITION_KEYS])
+
+
+def _partitioning():
+    pa, ds = _require_pyarrow()
+    return ds.partitioning(pa.schema([(key, pa.string()) for key in PARTITION_KEYS]), flavor="hive")
+
+
+def _dataset(root: Path):
+    _, ds = _require_pyarrow()
+    return ds.dataset(root, format="parquet", partitioning=_partitioning(), schema=history_schema())
+
+
+def append_crawl(source: Path | str | pd.DataFrame, root: Path | str = HISTORY_DIR) -> int:
+    """
+    Dopisuje wynik crawla (plik CSV/Parquet z main_otodom.py albo ramkę o tych kolumnach)
+    do historii. Z kilku pobrań tej samej oferty jednego dnia zostaje najnowsze, a oferty
+    zapisane już wcześniej pod tym samym dniem są pomijane. Zwraca liczbę dopisanych wierszy.
+    """
+    pa, ds = _require_pyarrow()
+    root = Path(root)
+    df = source.copy() if isinstance(source, pd.DataFrame) else read_partition(source)
+    df = df.reindex(columns=list(POLISH_COLUMNS.values()))
+    df = df.astype(object).where(df.notna() & (df != ""), None)
+
+    scraped = pd.to_datetime(df["data_pobrania"], format="ISO8601", errors="coerce")
+    df["data"] = scraped.dt.strftime("%Y-%m-%d")
+    df = df[df["data"].notna() & df["url"].notna()]
+    df["województwo"] = df["województwo"].fillna("brak informacji")
+    df = df.sort_values("data_pobrania", kind="stable").drop_duplicates(["url", "data"], keep="last")
+
+    if root.exists() and not df.empty:
+        days = sorted(df["data"].unique())
+        seen = _dataset(root).to_table(columns=["url", "data"], filter=ds.field("data").isin(days)).to_pandas()
+        if not seen.empty:
+            known = pd.MultiIndex.from_frame(seen[["url", "data"]])
+            df = df[~pd.MultiIndex.from_frame(df[["url", "data"]]).isin(known)]
+    if df.empty:
+        return 0
+
+    for column, source_column in NUMERIC.items():
+        df[column] = to_number(df[source_column].astype("str").where(df[source_column].notna()))
+    df["cena_m2"] = df["cena"] / df["powierzchnia_m2"]
+
+    schema = history_schema()
+    df = df.sort_values(PARTITION_KEYS + ["miasto"], kind="stable")  # miasta w ciągłych grupach wierszy
+    table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    ds.write_dataset(
+        table, root, format="parquet", partitioning=_partitioning(),
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",  # nowe pliki obok istniejących
+    )
+    return len(df)
+
+
+def query(columns: list[str] | None = None, start: date | str | None = None, end: date | str | None = None,
+          voivodeships: Iterable[str] | None = None, where=None,
+          root: Path | str = HISTORY_DIR) -> pd.DataFrame:
+    """
+    Wiersze historii z dni [*start*, *end*] i podanych województw – pozostałe partycje nie są
+    w ogóle otwierane. *where* to dodatkowe wyrażenie `pyarrow.dataset` (np.
+    `ds.field("miasto") == "Kraków"`, `ds.field("cena") < 5000`) sprawdzane już przy
+    odczycie na podstawie statystyk grup wierszy. *columns* – tylko te kolumny.
+    """
+    _, ds = _require_pyarrow()
+    condition = ds.scalar(True)
+    if start is not None:
+        condition &= ds.field("data") >= str(start)
+    if end is not None:
+        condition &= ds.field("data") <= str(end)
+    if voivodeships is not None:
+        condition &= ds.field("województwo").isin(list(voivodeships))
+    if where is not None:
+        condition &= where
+    if not Path(root).exists():
+        return pd.DataFrame(columns=columns or history_schema().names)
+    return _dataset(Path(root)).to_table(columns=columns, filter=condition).to_pandas()
+
+
+def price_trend(freq: str = "W", by: str | None = "województwo", value: str = "cena_m2",
+                start: date | str | None = None, end: date | str | None = None,
+                voivodeships: Iterable[str] | None = None, where=None,
+                root: Path | str = HISTORY_DIR) -> pd.DataFrame:
+    """
+    Szereg czasowy: liczba ofert, średnia i mediana *value* w okresach *freq* ("D", "W", "M")
+    – w podziale na *by* (np. województwo, miasto) albo łącznie (by=None).
+    """
+    columns = ["data", value] + ([by] if by else [])
+    df = query(columns, start, end, voivodeships, where, root)
+    df["okres"] = pd.to_datetime(df["data"]).dt.to_period(freq).dt.start_time
+    keys = ["okres"] + ([by] if by else [])
+    return df.groupby(keys)[value].agg(liczba_ofert="count", średnia="mean", mediana="median").reset_index()
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", type=Path, default=HISTORY_DIR, help="katalog historii")
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="dopisz wynik crawla do historii")
+    append.add_argument("files", nargs="+", type=Path)
+    trend = commands.add_parser("trend", help="szereg czasowy cen")
+    trend.add_argument("--freq", default="W", help="D, W lub M")
+    trend.add_argument("--by", default="województwo", help="kolumna podziału ('' = łącznie)")
+    trend.add_argument("--value", default="cena_m2", help="cena, cena_m2 lub powierzchnia_m2")
+    trend.add_argument("--since", help="od dnia RRRR-MM-DD")
+    trend.add_argument("--until", help="do dnia RRRR-MM-DD")
+    trend.add_argument("--wojewodztwo", nargs="+", help="tylko te województwa")
+    options = parser.parse_args(args)
+
+    if options.command == "append":
+        for file in options.files:
+            print(f"✅ '{file}': dopisano {append_crawl(file, options.root)} ofert do '{options.root}'")
+    else:
+        table = price_trend(options.freq, options.by or None, options.value, options.since, options.until,
+                            options.wojewodztwo, root=options.root)
+        print(table.round({"średnia": 1, "mediana": 1}).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# location_otodom.py
+"""
+Wsadowa normalizacja lokalizacji ofert. Zamiast parsować każdy wiersz osobno, kolumna
+"lokalizacja" jest rozbijana na unikalne wartości (te same kilka tysięcy adresów powtarza się
+w milionach wierszy historii), każda z nich jest parsowana raz (`parse_location`, z pamięcią
+podręczną między wywołaniami), a wynik rozkładany z powrotem po wierszach.
+
+Spójność zapewnia indeks `Gazetteer` (województwo → miasto → dzielnica) budowany z danych:
+pisownia nazw jest ujednolicana do najczęstszej, województwa – do nazw z GeoJSON-a, a nazwa
+rozpoznana przez heurystykę jako miasto, która w indeksie jest (głównie) dzielnicą jednego
+miasta tego województwa, trafia do dzielnicy.
+
+    python location_otodom.py otodom_wynajem.csv -o otodom_wynajem_lokalizacje.csv
+"""
+import argparse
+import json
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from discovery_otodom import load_voivodeships
+from parser_otodom import parse_location
+
+LOCATION_FIELDS = ["wojewodztwo", "powiat", "miasto", "dzielnica", "ulica"]
+# Kolumny w pliku wynikowym (jak w writer_otodom.POLISH_COLUMNS)
+LOCATION_COLUMNS = {"wojewodztwo": "województwo", "powiat": "powiat", "miasto": "miasto",
+                    "dzielnica": "dzielnica", "ulica": "ulica"}
+MISSING = "brak informacji"
+LOCATION_CACHE_SIZE = 200_000
+
+
+@lru_cache(maxsize=LOCATION_CACHE_SIZE)
+def parse_location_cached(location_str: str) -> tuple[str | None, ...]:
+    """`parse_location` z pamięcią podręczną – krotka pól w kolejności `LOCATION_FIELDS`."""
+    parsed = parse_location(location_str)
+    return tuple(parsed[field] for field in LOCATION_FIELDS)
+
+
+def _key(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+def _clean(name: str | None) -> str | None:
+    if name is None:
+        return None
+    name = " ".join(name.split())
+    return None if not name or name == MISSING else name
+
+
+@lru_cache(maxsize=1)
+def _official_voivodeships() -> dict[str, str]:
+    try:
+        return {_key(name): name.lower() for name in load_voivodeships()}
+    except OSError:
+        return {}
+
+
+def canonical_voivodeship(name: str | None) -> str | None:
+    """'Województwo Mazowieckie' / 'MAZOWIECKIE' → 'mazowieckie'."""
+    name = _clean(name)
+    if name is None:
+        return None
+    key = _key(name)
+    for prefix in ("województwo ", "woj. "):
+        key = key.removeprefix(prefix)
+    return _official_voivodeships().get(key, key)
+
+
+class Gazetteer:
+    """
+    Indeks nazw z dotychczasowych danych: województwo → miasto → dzielnica (oraz powiaty
+    województwa) z liczbą wystąpień każdej pisowni. Można go uzupełniać kolejnymi
+    fragmentami danych (`update`) i zapisywać między uruchomieniami (`save` / `load`).
+    """
+
+    def __init__(self):
+        self.cities: dict[str, dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+        self.districts: dict[tuple[str, str], dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+        self.powiats: dict[str, dict[str, Counter]] = defaultdict(lambda: defaultdict(Counter))
+        self._owners: dict[tuple[str, str], set[str]] | None = None  # (województwo, dzielnica) → miasta
+
+    def update(self, parsed: list[tuple], counts: list[int]):
+        """Dodaje sparsowane lokalizacje (krotki jak z `parse_location_cached`) z liczbą wierszy."""
+        self._owners = None
+        for (voivodeship, powiat, city, district, _), count in zip(parsed, counts):
+            voivodeship, powiat, city, district = (
+                canonical_voivodeship(voivodeship), _clean(powiat), _clean(city), _clean(district))
+            if voivodeship is None:
+                continue
+            if powiat:
+                self.powiats[voivodeship][_key(powiat)][powiat] += count
+            if city:
+                self.cities[voivodeship][_key(city)][city] += count
+                if district:
+                    self.districts[voivodeship, _key(city)][_key(district)][district] += count
+
+    @staticmethod
+    def _spelling(variants: dict[str, Counter], name: str) -> str:
+        counter = variants.get(_key(name))
+        return counter.most_common(1)[0][0] if counter else name
+
+    def _district_of(self, voivodeship: str, name: str) -> str | None:
+        """
+        Miasto, którego dzielnicą jest *name* – jeśli dokładnie jedno w województwie i nazwa
+        występuje częściej jako jego dzielnica niż jako samodzielne miasto.
+        """
+        if self._owners is None:
+            self._owners = defaultdict(set)
+            for (voiv, city), districts in self.districts.items():
+                for district in districts:
+                    self._owners[voiv, district].add(city)
+        key = _key(name)
+        cities = self._owners.get((voivodeship, key), set())
+        if len(cities) != 1:
+            return None
+        owner = next(iter(cities))
+        as_district = sum(self.districts[voivodeship, owner][key].values())
+        as_city = sum(self.cities.get(voivodeship, {}).get(key, Counter()).values())
+        return owner if as_district > as_city else None
+
+    def canonical(self, parsed: tuple, location_str: str | None = None) -> tuple[str | None, ...]:
+        """
+        Lokalizacja w ujednoliconej pisowni, w kolejności `LOCATION_FIELDS`. Jeśli heurystyka
+        nie znalazła dzielnicy, a w *location_str* jest znana dzielnica miasta
+        (np. 'ul. Puławska 12, Mokotów, Warszawa, mazowieckie') – zostaje uzupełniona.
+        """
+        voivodeship, powiat, city, district, street = parsed
+        voivodeship, powiat, city, district, street = (
+            canonical_voivodeship(voivodeship), _clean(powiat), _clean(city), _clean(district), _clean(street))
+        if voivodeship is None:
+            return voivodeship, powiat, city, district, street
+        cities = self.cities.get(voivodeship, {})
+        if city and district is None and street is None:
+            owner = self._district_of(voivodeship, city)
+            if owner is not None:
+                city, district = self._spelling(cities, owner), city
+        if city and district is None and location_str:
+            known = self.districts.get((voivodeship, _key(city)), {})
+            district = next((part for part in map(_clean, location_str.split(","))
+                             if part and _key(part) in known), None)
+        if powiat:
+            powiat = self._spelling(self.powiats.get(voivodeship, {}), powiat)
+        if city:
+            if district:
+                district = self._spelling(self.districts.get((voivodeship, _key(city)), {}), district)
+            city = self._spelling(cities, city)
+        return voivodeship, powiat, city, district, street
+
+    def save(self, path: Path | str):
+        data = {
+            "cities": {v: {k: dict(c) for k, c in names.items()} for v, names in self.cities.items()},
+            "districts": [[v, city, {k: dict(c) for k, c in names.items()}]
+                          for (v, city), names in self.districts.items()],
+            "powiats": {v: {k: dict(c) for k, c in names.items()} for v, names in self.powiats.items()},
+        }
+        Path(path).write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: Path | str) -> "Gazetteer":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        gazetteer = cls()
+        for v, names in data["cities"].items():
+            for k, counter in names.items():
+                gazetteer.cities[v][k].update(counter)
+        for v, city, names in data["districts"]:
+            for k, counter in names.items():
+                gazetteer.districts[v, city][k].update(counter)
+        for v, names in data["powiats"].items():
+            for k, counter in names.items():
+                gazetteer.powiats[v][k].update(counter)
+        return gazetteer
+
+
+def normalize_locations(locations: pd.Series, gazetteer: Gazetteer | None = None) -> pd.DataFrame:
+    """
+    Rozbija kolumnę lokalizacji na kolumny województwo, powiat, miasto, dzielnica, ulica
+    (braki jako "brak informacji"). Parsowane są tylko unikalne wartości; indeks *gazetteer*
+    (domyślnie nowy) jest najpierw uzupełniany danymi z *locations*.
+    """
+    if gazetteer is None:
+        gazetteer = Gazetteer()
+    codes, uniques = pd.factorize(locations)
+    counts = pd.Series(codes[codes >= 0]).value_counts().reindex(range(len(uniques)), fill_value=0)
+    parsed = [parse_location_cached(str(value)) for value in uniques]
+    gazetteer.update(parsed, counts.tolist())
+
+    canonical = pd.DataFrame([gazetteer.canonical(p, str(value)) for p, value in zip(parsed, uniques)],
+                             columns=LOCATION_FIELDS)
+    # wiersz dla braku lokalizacji (kod -1) – na końcu tabeli
+    canonical.loc[len(canonical)] = [None] * len(LOCATION_FIELDS)
+    rows = canonical.take(codes % len(canonical)).fillna(MISSING)
+    rows.index = locations.index
+    return rows.rename(columns=LOCATION_COLUMNS)
+
+
+def add_location_columns(df: pd.DataFrame, column: str = "lokalizacja",
+                         gazetteer: Gazetteer | None = None) -> pd.DataFrame:
+    """Nadpisuje kolumny lokalizacji w ramce wynikami `normalize_locations`."""
+    normalized = normalize_locations(df[column], gazetteer)
+    return df.assign(**{name: normalized[name] for name in normalized.columns})
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", type=Path, help="plik CSV z kolumną 'lokalizacja'")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="plik wynikowy")
+    parser.add_argument("--gazetteer", type=Path, help="plik JSON indeksu – wczytywany, jeśli istnieje, i zapisywany")
+    options = parser.parse_args(args)
+
+    gazetteer = Gazetteer.load(options.gazetteer) if options.gazetteer and options.gazetteer.exists() else Gazetteer()
+    df = pd.read_csv(options.csv, dtype="str", keep_default_na=False, encoding="utf-8-sig")
+    add_location_columns(df, gazetteer=gazetteer).to_csv(options.output, index=False, encoding="utf-8-sig")
+    if options.gazetteer:
+        gazetteer.save(options.gazetteer)
+    print(f"✅ Zapisano {len(df)} wierszy do '{options.output}'")
+
+
+if __name__ == "__main__":
+    main()
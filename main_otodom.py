@@ -1,217 +1,338 @@
-from requests import get
-from bs4 import BeautifulSoup
-from pandas import DataFrame
+import argparse
+import asyncio
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from queue import Queue
+from threading import Event, Lock, Thread
+from requests import HTTPError, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+from bs4 import BeautifulSoup, Tag
 import time
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 import re 
 from os import path  # Added for file existence check
-from sys import stdout
+from pathlib import Path
+from sys import stdin, stdout
+from typing import Callable, Iterable, Iterator
+
+from cache_otodom import CACHE_DIR, ResponseCache
+from checkpoint_otodom import CHECKPOINT_DB, CheckpointStore
+from discovery_otodom import SearchSlice, plan_slices
+from metrics_otodom import CrawlMetrics
+from throttle_otodom import THROTTLE_STATUSES, AdaptiveLimiter
+from parser_otodom import HTML_PARSER, parse_batch, parse_html, parse_location  # noqa: F401 – parse_location dla zgodności importów
+from snapshot_otodom import CHANGED, NEW, SNAPSHOT_DB, UNCHANGED, OfferSnapshot
+from writer_otodom import RowWriter, merge_partitions
 
 # --------- Configuration ---------
 SEARCH_URL   = "https://www.otodom.pl/pl/oferty/wynajem/mieszkanie"
 HEADERS      = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                                "AppleWebKit/537.36 (KHTML, like Gecko) "
                                "Chrome/113.0.0.0 Safari/537.36"}
-DELAY        = 0    # seconds between requests
+ADAPTIVE     = True # adaptacyjne tempo i liczba zapytań w locie (throttle_otodom.py); False = bez ograniczeń
+CONCURRENCY  = 8    # liczba równoległych zapytań o szczegóły ofert (1 = tryb szeregowy)
+PIPELINE     = True # szczegóły pobierane już w trakcie przeglądania stron wyników
+OFFLINE      = False  # strony wyłącznie z cache CACHE_DIR, bez ruchu sieciowego (--offline)
+USE_CACHE    = False  # dyskowy cache odpowiedzi z rewalidacją 304 (--cache)
+USE_NEXT_DATA = True  # dane oferty z osadzonego JSON-a (__NEXT_DATA__), DOM tylko jako zapas
+PARSE_PROCESSES = 0 # >0: parsowanie stron w puli tylu procesów (0 = w wątkach pobierających)
+PARSE_BATCH  = 8    # liczba stron wysyłanych do procesu parsującego jednym zadaniem
+DISCOVERY_WORKERS = 4  # wycinki wyszukiwania przeglądane równolegle (--partitioned)
+SLICE_MAX_PAGES = 10   # wycinek z większą liczbą stron wyników jest dzielony na mniejsze
+TIMEOUT      = 10   # seconds per request
+POOL_SIZE    = CONCURRENCY + 1  # połączenia keep-alive w puli; run_crawl dobiera je do liczby wątków
+MAX_RETRIES  = 4    # ponowienia przy 429/5xx, zerwanym połączeniu i timeoucie
+RETRY_STATUSES = (500, 502, 504)  # ponawiane przez urllib3; 403/429/503 obsługuje AdaptiveLimiter
+BACKOFF      = 0.5  # backoff wykładniczy 0.5 s, 1 s, 2 s... (nagłówek Retry-After ma pierwszeństwo)
 OUTPUT_CSV   = "otodom_wynajem.csv"
+HISTORY_DIR  = Path("historia")  # zbiór Parquet z historią wszystkich crawli (--history)
+METRICS_INTERVAL = 30  # co ile sekund metryki są zapisywane w trakcie crawla (--metrics)
 
-# Zapytaj użytkownika o limit ogłoszeń
-while True:
-    limit_input = input("Ile ogłoszeń pobrać? (wpisz liczbę lub Enter dla wszystkich): ").strip()
-    if limit_input == '' or limit_input.lower() == 'wszystkie':
-        MAX_LISTINGS = None
-        break
-    else:
-        try:
-            MAX_LISTINGS = int(limit_input)
-            if MAX_LISTINGS <= 0:
-                raise ValueError
-            break
-        except ValueError:
-            MAX_LISTINGS = None
-            print("Nieprawidłowa liczba")
+# --------- Helpers ---------
+METRICS = CrawlMetrics()  # metryki bieżącego crawla (zerowane w run_crawl)
+_session: Session | None = None
+_session_lock = Lock()
 
-# Check if the output file already exists
-if path.exists(OUTPUT_CSV):
-    new_name = input(f"Plik '{OUTPUT_CSV}' już istnieje. Podaj nową nazwę pliku (lub naciśnij Enter, aby nadpisać): ").strip()
-    if new_name:
-        OUTPUT_CSV = new_name
+def make_session(pool_size: int = POOL_SIZE, max_retries: int = MAX_RETRIES,
+                 backoff: float = BACKOFF, retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 respect_retry_after: bool = True) -> Session:
+    """
+    Tworzy sesję HTTP z pulą połączeń keep-alive, kompresją (gzip/deflate, br gdy
+    zainstalowane jest `brotli`) i ponowieniami z backoffem wykładniczym honorującymi Retry-After.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff,
+        status_forcelist=frozenset(retry_statuses),
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=respect_retry_after,  # False: 429/503 z Retry-After trafiają do AdaptiveLimiter
+        raise_on_status=False,  # po wyczerpaniu prób błąd zgłasza raise_for_status()
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = Session()
+    session.headers.update(HEADERS)
+    session.headers.update(make_headers(accept_encoding=True))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def _crawl_session(pool_size: int = POOL_SIZE) -> Session:
+    # bez sterownika tempa przeciążenia (429/503) ponawia urllib3, honorując Retry-After
+    session = make_session(pool_size, retry_statuses=RETRY_STATUSES if ADAPTIVE else (*RETRY_STATUSES, 429, 503),
+                           respect_retry_after=not ADAPTIVE)
+    session.hooks["response"].append(METRICS.on_response)
+    session.hooks["response"].append(on_response_throttle)
+    return session
+
+def get_session() -> Session:
+    """Zwraca współdzieloną (także między wątkami) sesję HTTP, tworząc ją przy pierwszym użyciu."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _crawl_session()
+        return _session
+
+def reset_session(pool_size: int = POOL_SIZE):
+    """
+    Nowa współdzielona sesja z pulą *pool_size* połączeń – tyle, ile wątków pobiera naraz,
+    inaczej urllib3 odrzuca nadmiarowe połączenia keep-alive ("Connection pool is full").
+    Uwzględnia też bieżące ADAPTIVE.
+    """
+    global _session
+    with _session_lock:
+        old, _session = _session, _crawl_session(pool_size)
+    if old is not None:
+        old.close()
+
+_limiter: AdaptiveLimiter | None = None
+
+def get_limiter() -> AdaptiveLimiter | None:
+    """Zwraca współdzielony sterownik tempa (gdy ADAPTIVE), tworząc go przy pierwszym użyciu."""
+    global _limiter
+    if not ADAPTIVE:
+        return None
+    with _session_lock:
+        if _limiter is None:
+            _limiter = AdaptiveLimiter(CONCURRENCY)
+        return _limiter
+
+def reset_limiter(max_concurrency: int):
+    """Nowy sterownik tempa (gdy ADAPTIVE) dla crawla z *max_concurrency* zapytaniami w locie."""
+    global _limiter
+    with _session_lock:
+        _limiter = AdaptiveLimiter(max_concurrency) if ADAPTIVE else None
+
+def on_response_throttle(response, *args, **kwargs):
+    limiter = _limiter
+    if limiter is not None:
+        limiter.on_response(response)
+
+_cache: ResponseCache | None = None
+_cache_lock = Lock()
+
+def get_cache() -> ResponseCache | None:
+    """Zwraca współdzielony cache odpowiedzi (gdy USE_CACHE), tworząc go przy pierwszym użyciu."""
+    global _cache
+    if not USE_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(CACHE_DIR, offline=OFFLINE)
+        return _cache
+
+def configure(cache: bool | None = None, offline: bool | None = None, adaptive: bool | None = None):
+    """
+    Ustawia USE_CACHE, OFFLINE (wymusza cache) i ADAPTIVE; None zostawia bieżącą wartość.
+    Cache o innych ustawieniach jest tworzony od nowa; sesję i sterownik tempa odtwarzają
+    `reset_session` i `reset_limiter` (run_crawl robi to na starcie).
+    """
+    global USE_CACHE, OFFLINE, ADAPTIVE, _cache
+    if offline is not None:
+        OFFLINE = offline
+    if cache is not None:
+        USE_CACHE = cache
+    USE_CACHE = USE_CACHE or OFFLINE
+    if adaptive is not None:
+        ADAPTIVE = adaptive
+    with _cache_lock:
+        if _cache is not None and (not USE_CACHE or _cache.offline != OFFLINE):
+            _cache = None
+
+def fetch_html(url: str, stage: str = "detail") -> str:
+    """Treść strony (z cache, gdy włączony); czas, bajty i statusy trafiają do METRICS jako etap *stage*."""
+    with METRICS.stage(stage):
+        cache = get_cache()
+        limiter = None if cache is not None and cache.offline else get_limiter()
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                with limiter.slot(url) if limiter is not None else nullcontext():
+                    if cache is not None:
+                        return cache.fetch(get_session(), url, TIMEOUT)
+                    r = get_session().get(url, timeout=TIMEOUT)
+                    r.raise_for_status()
+                    return r.text
+            except HTTPError as e:
+                # sterownik już zwolnił i wstrzymał hosta (Retry-After) – kolejna próba na nowych warunkach
+                if limiter is None or e.response is None or e.response.status_code not in THROTTLE_STATUSES \
+                        or attempt == MAX_RETRIES:
+                    raise
 
-# --------- Helpers ---------
 def fetch_soup(url: str) -> BeautifulSoup:
-    r = get(url, headers=HEADERS, timeout=10)
-    r.raise_for_status()
-    return BeautifulSoup(r.text, "html.parser")
-
-def parse_location(location_str: str) -> dict[str, str | None]:
-    """Parse location string into components: województwo, powiat, miasto, dzielnica, ulica"""
-    if not location_str:
-        return {
-            'wojewodztwo': None,
-            'powiat': None,
-            'miasto': None,
-            'dzielnica': None,
-            'ulica': None
-        }
-    parts = [part.strip() for part in location_str.split(',')]
-    n = len(parts)
-    result = {
-        'wojewodztwo': None,
-        'powiat': None,
-        'miasto': None,
-        'dzielnica': None,
-        'ulica': None
-    }
-    if n == 0:
-        return result
-    # Województwo
-    result['wojewodztwo'] = parts[-1]
-    # Powiat (jeśli drugi od końca jest z małej litery)
-    powiat_idx = None
-    if n > 1 and parts[-2].islower():
-        result['powiat'] = parts[-2]
-        powiat_idx = n - 2
-    # Miasto
-    if powiat_idx is not None and n > 2:
-        result['miasto'] = parts[-3]
-        miasto_idx = n - 3
-    elif n > 1:
-        result['miasto'] = parts[-2]
-        miasto_idx = n - 2
-    else:
-        miasto_idx = None
-    # Ulica
-    ulica_idx = None
-    for i, part in enumerate(parts):
-        if part.startswith('ul.'):
-            result['ulica'] = part
-            ulica_idx = i
-            break
-    # Dzielnica
-    if result['ulica']:
-        # Jeśli ulica jest pierwszym elementem, dzielnica = brak informacji
-        if ulica_idx == 0:
-            result['dzielnica'] = None
-        # Jeśli jest coś przed ulicą i nie jest to miasto ani powiat, to to jest dzielnica
-        elif ulica_idx > 0:
-            # Sprawdzamy, czy element przed ulicą nie jest miastem ani powiatem
-            dzielnica_candidate = parts[ulica_idx - 1]
-            if (miasto_idx is not None and ulica_idx - 1 == miasto_idx) or (powiat_idx is not None and ulica_idx - 1 == powiat_idx):
-                result['dzielnica'] = None
-            elif not dzielnica_candidate.startswith('ul.'):
-                result['dzielnica'] = dzielnica_candidate
-            else:
-                result['dzielnica'] = None
-    elif miasto_idx is not None and miasto_idx > 0:
-        # Jeśli nie ma ulicy, a są co najmniej 3 elementy, dzielnica to element przed miastem, jeśli nie jest ulicą
-        dzielnica_candidate = parts[miasto_idx - 1]
-        if not dzielnica_candidate.startswith('ul.'):
-            result['dzielnica'] = dzielnica_candidate
-        else:
-            result['dzielnica'] = None
-    # Jeśli nie znaleziono dzielnicy, zostaje None
-    return result
+    html = fetch_html(url, "search")
+    with METRICS.stage("search_parse"):
+        return BeautifulSoup(html, HTML_PARSER)
 
-def get_listing_links(max_listings: int | None = None) -> set[str]:
-    """Zwraca unikalne linki do wszystkich ofert z listingu (wszystkie strony lub do limitu)."""
+PRICE_RE = re.compile(r"\d[\d\s\u00a0]*(?:[.,]\d+)?\s*zł")
+
+def card_fingerprint(a: Tag) -> str:
+    """
+    Odcisk karty oferty z listy wyników: cena i tytuł. Zmiana któregokolwiek z nich
+    oznacza, że szczegóły oferty trzeba pobrać ponownie.
+    """
+    card = a.find_parent("article") or a.find_parent("li") or a
+    title_el = card.select_one("[data-cy='listing-item-title']")
+    title = title_el.get_text(strip=True) if title_el else a.get_text(strip=True)
+    # cena z pojedynczego węzła tekstowego – tekst całej karty skleiłby ją z cyframi z tytułu
+    price_text = card.find(string=PRICE_RE)
+    match = PRICE_RE.search(price_text) if price_text else None
+    price = re.sub(r"\s", "", match.group()) if match else ""
+    return f"{price}|{title}"
+
+def page_cards(soup: BeautifulSoup, search_url: str = SEARCH_URL) -> Iterator[tuple[str, str]]:
+    """Linki do ofert na jednej stronie wyników wraz z odciskami kart (mogą się powtarzać)."""
+    domain = urlparse(search_url).hostname.removeprefix("www.")
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        if "/pl/oferta/" in href:
+            full = urljoin(search_url, href)
+            if urlparse(full).hostname.endswith(domain):
+                yield full, card_fingerprint(a)
+
+def iter_listing_cards(max_listings: int | None = None, search_url: str = SEARCH_URL,
+                       first_page: int = 1, page_step: int = 1) -> Iterator[tuple[str, str]]:
+    """
+    Przechodzi kolejne strony wyników i zwraca (yield) każdy nowy link do oferty, gdy tylko
+    zostanie znaleziony – deduplikacja odbywa się w locie – razem z odciskiem jego karty.
+    Kończy po stronie bez nowych linków albo po osiągnięciu limitu *max_listings*.
+    *first_page* i *page_step* pozwalają przejść tylko co n-tą stronę (podział między shardy).
+    """
     links = set()
-    page = 1
+    page = first_page
     while True:
-        url = SEARCH_URL if page == 1 else f"{SEARCH_URL}?page={page}"
+        url = search_url if page == 1 else f"{search_url}?page={page}"
         soup = fetch_soup(url)
         found_on_page = 0
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if "/pl/oferta/" in href:
-                full = urljoin("https://www.otodom.pl", href)
-                if urlparse(full).netloc.endswith("otodom.pl") and full not in links:
-                    links.add(full)
-                    found_on_page += 1
-                    if max_listings is not None and len(links) >= max_listings:
-                        print(f"Zebrano {len(links)} ogłoszeń (limit osiągnięty)")
-                        return links
+        for full, fingerprint in page_cards(soup, search_url):
+            if full not in links:
+                links.add(full)
+                found_on_page += 1
+                yield full, fingerprint
+                if max_listings is not None and len(links) >= max_listings:
+                    print(f"Zebrano {len(links)} ogłoszeń (limit osiągnięty)")
+                    return
         if found_on_page == 0:
             break  # Brak nowych ogłoszeń na stronie, kończymy
         print(f"Zebrano {len(links)} ogłoszeń (strona {page})")
-        page += 1
-    return links
+        page += page_step
 
-def parse_listing(url: str) -> dict[str, str | None]:
-    """Parsuje szczegóły pojedynczego ogłoszenia Otodom."""
-    soup = fetch_soup(url)
-    data: dict[str, str | None] = {}
-
-    datakeys_to_single_selectors = {
-        "title" : "h1[data-cy='adPageAdTitle']",
-        "price" : "strong[data-cy='adPageHeaderPrice']",
-        "deposit" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Kaucja:') + p",
-        "rooms" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Liczba pokoi:') + p",
-        "advertiser_type" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Typ ogłoszeniodawcy:') + p",
-        "heating" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Ogrzewanie:') + p",
-        "floor" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Piętro:') + p",
-        "finishing_state" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Stan wykończenia:') + p",
-        "available_from" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Dostępne od:') + p",
-        "building_year" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Rok budowy:') + p",
-        "elevator" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Winda:') + p",
-        "building_type" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Rodzaj zabudowy:') + p",
-        "building_material" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Materiał budynku:') + p",
-        "windows" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Okna:') + p",
-        "safety" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Bezpieczeństwo:') + p",
-        "location" : "div[data-sentry-element='Container'] a[data-sentry-element='StyledLink']",
-        "area": "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Powierzchnia:') + p",
-    }
-
-    datakeys_to_multi_selectors = {
-        "equipment" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Wyposażenie:') + p span",
-        "security" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Zabezpieczenia:') + p span",
-        "media" : "div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Media:') + p span",
-    }
-
-    for key, selector in datakeys_to_single_selectors.items():
-        element = soup.select_one(selector)
-        if key == "area" and element:
-            # Wyciągnij tylko liczbę (może być float) z tekstu np. "27.4 m²"
-            match = re.search(r"[\d,.]+", element.get_text(strip=True).replace(",", "."))
-            data[key] = float(match.group()) if match else None
-        else:
-            data[key] = element.get_text(strip=True) if element else None
-
-    for key, selector in datakeys_to_multi_selectors.items():
-        elements = soup.select(selector)
-        data[key] = ", ".join(element.get_text(strip=True) for element in elements) if elements else None
-
-    # Rent Fee (Additional Price)
-    fee_el = soup.select_one("div[data-sentry-element='AdditionalPriceWrapper']")
-    if fee_el:
-        fee_text = fee_el.get_text(strip=True)
-        match = re.search(r'\d+', fee_text)  # Extract only the numeric value
-        data["rent_fee"] = int(match.group()) if match else None
-    else:
-        data["rent_fee"] = None
-
-    # Parse location components
-    location_components = parse_location(data["location"])
-    data.update(location_components)
-
-    # Additional Information (lepsze rozdzielanie)
-    additional_info_el = soup.select_one("div[data-sentry-element='ItemGridContainer'] p:-soup-contains('Informacje dodatkowe:') + p")
-    if additional_info_el:
-        spans = additional_info_el.find_all("span")
-        if spans:
-            data["additional_info"] = ", ".join(span.get_text(strip=True) for span in spans)
-        else:
-            text = additional_info_el.get_text(strip=True)
-            items = re.split(r'[;,•·\u2022\u2023\u25E6\u2043\u2219]', text)
-            data["additional_info"] = ", ".join(item.strip() for item in items if item.strip())
-    else:
-        data["additional_info"] = None
+def iter_partitioned_cards(max_listings: int | None = None, search_url: str = SEARCH_URL,
+                           slices: Iterable[SearchSlice] | None = None, workers: int = DISCOVERY_WORKERS,
+                           max_pages: int = SLICE_MAX_PAGES) -> Iterator[tuple[str, str]]:
+    """
+    Odkrywanie ofert w niezależnych wycinkach wyszukiwania (domyślnie `plan_slices`:
+    województwo × przedział ceny), przeglądanych równolegle przez *workers* wątków, z globalną
+    deduplikacją linków. Wycinek, który nie kończy się w *max_pages* stronach, jest dzielony
+    (`SearchSlice.split`) i przeglądany od nowa w częściach – żaden nie wymaga głębokiej paginacji.
+    Zwraca te same pary (link, odcisk karty) co `iter_listing_cards`; jeśli któryś wycinek
+    się nie udał, na końcu zgłasza RuntimeError (odkrywanie było niepełne).
+    """
+    work: Queue[SearchSlice] = Queue()
+    found: Queue[tuple[str, str] | None] = Queue()
+    seen: set[str] = set()
+    seen_lock = Lock()
+    stop = Event()
+    failed: list[SearchSlice] = []
+    for search_slice in (plan_slices() if slices is None else slices):
+        work.put(search_slice)
+
+    def crawl_slice(search_slice: SearchSlice):
+        local = set()
+        for page in range(1, max_pages + 1):
+            if stop.is_set():
+                return
+            found_on_page = 0
+            for full, fingerprint in page_cards(fetch_soup(search_slice.url(search_url, page)), search_url):
+                if full in local:
+                    continue
+                local.add(full)
+                found_on_page += 1
+                with seen_lock:
+                    if full in seen:
+                        continue  # oferta z innego wycinka (albo z części przed podziałem)
+                    seen.add(full)
+                found.put((full, fingerprint))
+            if found_on_page == 0:
+                return  # wycinek przejrzany do końca
+        parts = search_slice.split()
+        if not parts:
+            print(f"\n⚠ Wycinka {search_slice} nie da się podzielić – przejrzano tylko {max_pages} stron")
+        for part in parts:
+            work.put(part)
+
+    def worker():
+        while True:
+            search_slice = work.get()
+            try:
+                crawl_slice(search_slice)
+            except Exception as e:
+                print(f"\n⚠ Błąd przy wycinku {search_slice}: {e}")
+                METRICS.error("search", e, str(search_slice))
+                failed.append(search_slice)
+            finally:
+                work.task_done()
+
+    def finish():
+        work.join()
+        found.put(None)
 
-    # URL & timestamp (unchanged)
-    data["url"] = url
-    data["scrape_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for _ in range(workers):
+        Thread(target=worker, daemon=True).start()
+    Thread(target=finish, daemon=True).start()
 
-    return data
+    count = 0
+    try:
+        while (card := found.get()) is not None:
+            yield card
+            count += 1
+            if max_listings is not None and count >= max_listings:
+                print(f"Zebrano {count} ogłoszeń (limit osiągnięty)")
+                return
+            if count % 100 == 0:
+                print(f"Zebrano {count} ogłoszeń ({work.unfinished_tasks} wycinków w toku)")
+    finally:
+        stop.set()  # wątki kończą na bieżącej stronie
+    print(f"Zebrano {count} ogłoszeń")
+    if failed:
+        raise RuntimeError(f"Nie udało się przejrzeć {len(failed)} wycinków wyszukiwania")
+
+def iter_listing_links(max_listings: int | None = None, search_url: str = SEARCH_URL) -> Iterator[str]:
+    """Jak `iter_listing_cards`, ale zwraca same linki."""
+    for link, _ in iter_listing_cards(max_listings, search_url):
+        yield link
+
+def get_listing_links(max_listings: int | None = None, search_url: str = SEARCH_URL) -> set[str]:
+    """Zwraca unikalne linki do wszystkich ofert z listingu (wszystkie strony lub do limitu)."""
+    return set(iter_listing_links(max_listings, search_url))
+
+def parse_listing(url: str) -> dict[str, str | None]:
+    """Pobiera i parsuje szczegóły pojedynczego ogłoszenia Otodom."""
+    html = fetch_html(url)
+    with METRICS.stage("parse"):
+        return parse_html(html, url, USE_NEXT_DATA)
 
 def print_progress_bar(iteration: int, total: int, start_time: float, length: int = 30):
     percent = f"{100 * (iteration / float(total)):.1f}"
@@ -227,64 +348,455 @@ def print_progress_bar(iteration: int, total: int, start_time: float, length: in
     if iteration == total:
         print()  # Nowa linia na końcu
 
-# --------- Main ---------
-def main():
-    print("▶ Pobieranie linków z Otodom...")
-    links = get_listing_links(MAX_LISTINGS)
-    print(f"✔ Znaleziono {len(links)} ofert. Scrapuję szczegóły...\n")
+def fill_missing(row: dict[str, str | None]) -> dict[str, str | None]:
+    """Uzupełnia brakujące dane domyślną wartością."""
+    for k, v in row.items():
+        if v is None or (isinstance(v, str) and not v.strip()):
+            row[k] = "brak informacji"
+    return row
+
+def record_offer(link: str, checkpoint: CheckpointStore | None, row: dict[str, str | None] | None = None,
+                 error: Exception | None = None) -> dict[str, str | None] | None:
+    """
+    Zapisuje wynik pobrania oferty: błąd jest zgłaszany komunikatem (zwraca None), a wiersz
+    uzupełniany domyślnymi wartościami. Wynik lub błąd trafia od razu do checkpointu.
+    """
+    if error is not None:
+        print(f"\n⚠ Błąd przy {link}: {error}")
+        METRICS.error("detail", error, link)
+        if checkpoint is not None:
+            checkpoint.mark_failed(link, str(error))
+        return None
+    METRICS.observe_row(row)  # puste pola liczone przed uzupełnieniem
+    row = fill_missing(row)
+    if checkpoint is not None:
+        checkpoint.mark_done(link, row)
+    return row
+
+def scrape_offer(link: str, checkpoint: CheckpointStore | None = None) -> dict[str, str | None] | None:
+    """Pobiera i parsuje jedną ofertę w bieżącym wątku."""
+    try:
+        row = parse_listing(link)
+    except Exception as e:
+        return record_offer(link, checkpoint, error=e)
+    return record_offer(link, checkpoint, row)
+
+class BatchedParser:
+    """
+    Parsowanie stron w puli procesów, oddzielone od pobierania, które zostaje w pętli zdarzeń
+    i wątkach. Strony wysyłane są partiami po *batch_size* (albo po *linger* s bez nowych
+    stron), żeby koszt przesyłania między procesami rozłożył się na wiele stron.
+    """
+
+    def __init__(self, processes: int, batch_size: int = PARSE_BATCH, linger: float = 0.005,
+                 use_next_data: bool = USE_NEXT_DATA):
+        self.batch_size = batch_size
+        self.linger = linger
+        self.use_next_data = use_next_data
+        self._pool = ProcessPoolExecutor(processes)
+        self._batch: list[tuple[str, str, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
 
-    rows = []
-    total = len(links)
+    async def parse(self, html: str, url: str) -> dict[str, str | None]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._batch.append((html, url, future))
+        if len(self._batch) >= self.batch_size:
+            self._submit()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger, self._submit)
+        return await future
+
+    def _submit(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            pages = [(html, url) for html, url, _ in batch]
+            done = asyncio.wrap_future(self._pool.submit(parse_batch, pages, self.use_next_data))
+            done.add_done_callback(partial(self._deliver, batch))
+
+    @staticmethod
+    def _deliver(batch: list[tuple[str, str, asyncio.Future]], done: asyncio.Future):
+        error = done.exception()
+        results = done.result() if error is None else [(False, error)] * len(batch)
+        for (_, _, future), (ok, value) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value if isinstance(value, Exception) else ValueError(value))
+
+    def close(self):
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+async def scrape_offer_async(link: str, executor: ThreadPoolExecutor, parser: BatchedParser | None,
+                             checkpoint: CheckpointStore | None = None) -> dict[str, str | None] | None:
+    """Pobiera ofertę w wątku *executor*; parsuje w puli procesów *parser*, a bez niej w tym samym wątku."""
+    loop = asyncio.get_running_loop()
+    if parser is None:
+        return await loop.run_in_executor(executor, scrape_offer, link, checkpoint)
+    try:
+        html = await loop.run_in_executor(executor, fetch_html, link)
+        start = time.perf_counter()
+        row = await parser.parse(html, link)
+        METRICS.observe("parse", time.perf_counter() - start)  # z oczekiwaniem na partię
+    except Exception as e:
+        return record_offer(link, checkpoint, error=e)
+    return record_offer(link, checkpoint, row)
+
+class InOrder:
+    """
+    Bufor przywracający kolejność: wiersze kończone przez workerów w dowolnej kolejności
+    przekazuje do *sink* w kolejności indeksów. Przechowuje tylko wiersze, które czekają
+    na wcześniejsze (None oznacza ofertę pominiętą z powodu błędu).
+    """
+
+    def __init__(self, sink: Callable[[dict[str, str | None]], None]):
+        self.sink = sink
+        self._pending: dict[int, dict[str, str | None] | None] = {}
+        self._next = 0
+
+    def put(self, idx: int, row: dict[str, str | None] | None):
+        self._pending[idx] = row
+        while self._next in self._pending:
+            row = self._pending.pop(self._next)
+            self._next += 1
+            if row is not None:
+                self.sink(row)
+
+async def scrape_listings_async(links: Iterable[str], concurrency: int = CONCURRENCY,
+                                checkpoint: CheckpointStore | None = None, writer: RowWriter | None = None,
+                                parse_processes: int = PARSE_PROCESSES) -> list[dict[str, str | None]]:
+    """
+    Pobiera szczegóły ofert pulą *concurrency* workerów asyncio (najwyżej tyle zapytań naraz
+    w locie – faktyczną liczbę i tempo wyznacza AdaptiveLimiter).
+    Blokujące `parse_listing` działa w wątkach, więc wiersze są identyczne jak w trybie
+    szeregowym, a ich kolejność zawsze odpowiada posortowanej liście linków.
+    Z *writer* wiersze są od razu zapisywane (i nie są zwracane).
+    """
+    ordered = sorted(links)
+    total = len(ordered)
+    rows: list[dict[str, str | None]] = []
+    results = InOrder(METRICS.timed("write", writer.write) if writer is not None else rows.append)
+    queue: asyncio.Queue[tuple[int, str]] = asyncio.Queue()
+    for item in enumerate(ordered):
+        queue.put_nowait(item)
+
+    start_time = time.time()
+    done = 0
+
+    async def worker(executor: ThreadPoolExecutor, parser: BatchedParser | None):
+        nonlocal done
+        while not queue.empty():
+            idx, link = queue.get_nowait()
+            results.put(idx, await scrape_offer_async(link, executor, parser, checkpoint))
+            done += 1
+            print_progress_bar(done, total, start_time)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor, \
+            (BatchedParser(parse_processes) if parse_processes > 0 else nullcontext()) as parser:
+        await asyncio.gather(*(worker(executor, parser) for _ in range(min(concurrency, total))))
+    return rows
+
+def scrape_listings(links: Iterable[str], concurrency: int = CONCURRENCY,
+                    checkpoint: CheckpointStore | None = None, writer: RowWriter | None = None,
+                    parse_processes: int = PARSE_PROCESSES) -> list[dict[str, str | None]]:
+    """
+    Scrapuje szczegóły wszystkich ofert – szeregowo (concurrency=1) lub równolegle; przy
+    *parse_processes* > 0 strony parsuje pula procesów (także przy concurrency=1).
+    """
+    if concurrency > 1 or parse_processes > 0:
+        return asyncio.run(scrape_listings_async(links, concurrency, checkpoint=checkpoint, writer=writer,
+                                                 parse_processes=parse_processes))
+    ordered = sorted(links)
+    rows: list[dict[str, str | None]] = []
+    sink = METRICS.timed("write", writer.write) if writer is not None else rows.append
+    total = len(ordered)
     start_time = time.time()
-    for idx, link in enumerate(links, 1):
+    for idx, link in enumerate(ordered, 1):
         print_progress_bar(idx, total, start_time)
+        row = scrape_offer(link, checkpoint)
+        if row is not None:
+            sink(row)
+    return rows
+
+async def scrape_pipeline_async(max_listings: int | None = None, concurrency: int = CONCURRENCY,
+                                search_url: str = SEARCH_URL,
+                                checkpoint: CheckpointStore | None = None,
+                                writer: RowWriter | None = None,
+                                snapshot: OfferSnapshot | None = None,
+                                parse_processes: int = PARSE_PROCESSES,
+                                cards: Iterator[tuple[str, str]] | None = None) -> list[dict[str, str | None]]:
+    """
+    Tryb potokowy: producent przegląda strony wyników i wrzuca nowe linki do kolejki,
+    a *concurrency* workerów równocześnie pobiera z niej szczegóły ofert. Pierwsze wiersze
+    powstają po pierwszej stronie wyników, a nie po całym etapie zbierania linków.
+    Limit *max_listings* zatrzymuje producenta, a workerzy kończą po opróżnieniu kolejki.
+    Wiersze zwracane są w kolejności znalezienia linków.
+    Z checkpointem najpierw ponawiane są linki niedokończone w poprzednim uruchomieniu,
+    a linki już zarejestrowane w bazie nie trafiają do kolejki drugi raz.
+    Z *writer* wiersze są od razu zapisywane (i nie są zwracane).
+    Z *snapshot* (crawl przyrostowy) szczegóły pobierane są tylko dla ofert nowych i takich,
+    których karta (cena, tytuł) się zmieniła; dla pozostałych używany jest zapisany wiersz
+    z aktualną datą pobrania. Po pełnym przejściu listy wyników (bez limitu) oferty, których
+    już nie ma, są oznaczane w migawce jako zdjęte.
+    *cards* zastępuje domyślne źródło kart (np. przefiltrowane do jednego sharda).
+    """
+    queue: asyncio.Queue[tuple[int, str] | None] = asyncio.Queue(maxsize=concurrency * 4)
+    rows: list[dict[str, str | None]] = []
+    results = InOrder(METRICS.timed("write", writer.write) if writer is not None else rows.append)
+    fingerprints: dict[str, str] = {}
+    loop = asyncio.get_running_loop()
+    discovered = done = 0
+    complete = False  # czy lista wyników została przejrzana w całości
+
+    async def producer(executor: ThreadPoolExecutor):
+        nonlocal discovered, complete, cards
+        if cards is None:
+            cards = iter_listing_cards(max_listings, search_url)
         try:
-            row = parse_listing(link)
-            # Uzupełnij brakujące dane domyślną wartością
-            for k, v in row.items():
-                if v is None or (isinstance(v, str) and not v.strip()):
-                    row[k] = "brak informacji"
-            rows.append(row)
+            if checkpoint is not None:
+                for link in checkpoint.pending_urls():
+                    await queue.put((discovered, link))
+                    discovered += 1
+            while (card := await loop.run_in_executor(executor, next, cards, None)) is not None:
+                link, fingerprint = card
+                if snapshot is not None:
+                    if snapshot.observe(link, fingerprint) == UNCHANGED:
+                        # oferta z checkpointu jest już w wyniku (checkpoint.rows() przy wznowieniu)
+                        if checkpoint is not None and not checkpoint.add_url(link):
+                            continue
+                        row = snapshot.stored_row(link)
+                        row["scrape_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        if checkpoint is not None:
+                            checkpoint.mark_done(link, row)
+                        results.put(discovered, row)
+                        discovered += 1
+                        continue
+                    fingerprints[link] = fingerprint
+                if checkpoint is not None and not checkpoint.add_url(link):
+                    continue  # pobrany wcześniej albo już w kolejce
+                await queue.put((discovered, link))
+                discovered += 1
+            complete = max_listings is None
         except Exception as e:
-            print(f"\n⚠ Błąd przy {link}: {e}")
-        time.sleep(DELAY)
-
-    df = DataFrame(rows)
-    # Mapowanie nazw kolumn na polskie
-    polish_columns = {
-        'title': 'tytuł',
-        'price': 'miesięcznie',
-        'rent_fee': 'czynsz',
-        'deposit': 'kaucja',
-        'area': 'powierzchnia',  # Dodano powierzchnię
-        'wojewodztwo': 'województwo',
-        'powiat': 'powiat',
-        'miasto': 'miasto',
-        'dzielnica': 'dzielnica',
-        'ulica': 'ulica',
-        'location': 'lokalizacja',
-        'rooms': 'liczba pokoi',
-        'advertiser_type': 'typ ogłoszeniodawcy',
-        'heating': 'ogrzewanie',
-        'floor': 'piętro',
-        'finishing_state': 'stan wykończenia',
-        'available_from': 'dostępne od',
-        'additional_info': 'informacje dodatkowe',
-        'building_year': 'rok budowy',
-        'elevator': 'winda',
-        'building_type': 'rodzaj zabudowy',
-        'building_material': 'materiał budynku',
-        'windows': 'okna',
-        'safety': 'bezpieczeństwo',
-        'equipment': 'wyposażenie',
-        'security': 'zabezpieczenia',
-        'media': 'media',
-        'url': 'url',
-        'scrape_date': 'data_pobrania'
-    }
-    df = df.rename(columns=polish_columns)
-    df.to_csv(OUTPUT_CSV, index=False, encoding="utf-8-sig")
-    print(f"\n✅ Zapisano dane do '{OUTPUT_CSV}'")
+            print(f"\n⚠ Błąd przy pobieraniu stron wyników: {e}")
+            METRICS.error("search", e)
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)  # sygnał końca dla każdego workera
+
+    async def worker(executor: ThreadPoolExecutor, parser: BatchedParser | None):
+        nonlocal done
+        while (item := await queue.get()) is not None:
+            idx, link = item
+            row = await scrape_offer_async(link, executor, parser, checkpoint)
+            if row is not None and link in fingerprints:
+                snapshot.save(link, fingerprints.pop(link), row)
+            results.put(idx, row)
+            done += 1
+            stdout.write(f"\rPobrano szczegóły: {done}/{discovered}")
+            stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=concurrency + 1) as executor, \
+            (BatchedParser(parse_processes) if parse_processes > 0 else nullcontext()) as parser:
+        await asyncio.gather(producer(executor), *(worker(executor, parser) for _ in range(concurrency)))
+    if snapshot is not None:
+        delisted = snapshot.mark_delisted() if complete else 0
+        print(f"\nCrawl przyrostowy: {snapshot.stats[NEW]} nowych, {snapshot.stats[CHANGED]} zmienionych, "
+              f"{snapshot.stats[UNCHANGED]} bez zmian, {delisted} zdjętych")
+    return rows
+
+def shard_of(url: str, shards: int) -> int:
+    """Numer sharda dla URL-a – stały między procesami i maszynami (w przeciwieństwie do hash())."""
+    return zlib.crc32(url.encode("utf-8")) % shards
+
+def shard_cards(cards: Iterator[tuple[str, str]], shard: int, shards: int) -> Iterator[tuple[str, str]]:
+    """Zostawia tylko karty ofert należących do sharda *shard* z *shards*."""
+    for link, fingerprint in cards:
+        if shard_of(link, shards) == shard:
+            yield link, fingerprint
+
+def shard_path(file: str | Path, shard: int, shards: int) -> Path:
+    """Ścieżka partycji sharda, np. otodom_wynajem.part-01-of-04.csv (bez zmian przy jednym shardzie)."""
+    file = Path(file)
+    if shards == 1:
+        return file
+    return file.with_name(f"{file.stem}.part-{shard:02d}-of-{shards:02d}{file.suffix}")
+
+def run_crawl(output: str | Path = OUTPUT_CSV, max_listings: int | None = None, *,
+              concurrency: int = CONCURRENCY, pipeline: bool = PIPELINE, resume: bool = False,
+              incremental: bool = False, shard: int = 0, shards: int = 1, shard_by: str = "hash",
+              search_url: str = SEARCH_URL, parse_processes: int = PARSE_PROCESSES,
+              partitioned: bool = False, history: str | Path | None = None,
+              metrics: str | Path | None = None, metrics_interval: float = METRICS_INTERVAL,
+              cache: bool | None = None, offline: bool | None = None, adaptive: bool | None = None) -> int:
+    """
+    Pełny crawl bez żadnych pytań – punkt wejścia do użycia z kodu lub harmonogramu.
+    Przy *shards* > 1 przetwarza tylko swoją część: oferty o `shard_of(url) == shard`
+    (shard_by="hash") albo co *shards*-tą stronę wyników (shard_by="pages"). Każdy shard ma
+    własną partycję wyniku, checkpoint i migawkę, więc shardy można uruchamiać jako osobne
+    procesy lub na osobnych maszynach, a potem scalić `merge_partitions`.
+    Przy *partitioned* oferty odkrywane są równolegle w wycinkach wyszukiwania
+    (`iter_partitioned_cards`) zamiast jednej, głębokiej paginacji.
+    *history* – katalog historii (history_otodom.py), do którego dopisywany jest wynik.
+    *metrics* – plik metryk crawla (METRICS): .prom (Prometheus) lub .json, zapisywany co
+    *metrics_interval* s i na końcu, także po przerwanym crawlu.
+    *cache*, *offline*, *adaptive* – jak --cache, --offline i --no-adaptive (`configure`);
+    None zostawia bieżące ustawienie modułu (USE_CACHE, OFFLINE, ADAPTIVE).
+    Zwraca liczbę zapisanych ofert.
+    """
+    if not 0 <= shard < shards:
+        raise ValueError(f"Nieprawidłowy shard {shard} (dozwolone 0..{shards - 1})")
+    if incremental and shards > 1 and shard_by == "pages":
+        # shard widzi tylko część stron, więc nie może stwierdzić, że oferta zniknęła
+        raise ValueError("Crawl przyrostowy wymaga podziału shard_by='hash'")
+    if partitioned and shards > 1 and shard_by == "pages":
+        raise ValueError("Odkrywanie w wycinkach wymaga podziału shard_by='hash'")
+
+    configure(cache, offline, adaptive)
+    METRICS.reset()
+    reset_limiter(concurrency)
+    # wątki pobierające szczegóły + producent stron wyników (+ wątki wycinków przy *partitioned*)
+    reset_session(concurrency + 1 + (DISCOVERY_WORKERS if partitioned else 0))
+    if metrics is not None:
+        METRICS.start_export(metrics, metrics_interval)
+    try:
+        output = shard_path(output, shard, shards)
+        if partitioned:
+            cards = shard_cards(iter_partitioned_cards(max_listings, search_url), shard, shards)
+        elif shard_by == "pages":
+            cards = iter_listing_cards(max_listings, search_url, first_page=shard + 1, page_step=shards)
+        else:
+            cards = shard_cards(iter_listing_cards(max_listings, search_url), shard, shards)
+
+        checkpoint = CheckpointStore(shard_path(CHECKPOINT_DB, shard, shards), resume=resume)
+        with RowWriter(output) as writer:
+            if resume:
+                print(f"▶ Wznawianie crawla z '{checkpoint.path}' ({checkpoint.counts()})")
+                writer.write_many(checkpoint.rows())  # wiersze pobrane przed przerwaniem
+            if pipeline or incremental:
+                print("▶ Pobieranie linków i szczegółów ofert z Otodom...")
+                snapshot = OfferSnapshot(shard_path(SNAPSHOT_DB, shard, shards)) if incremental else None
+                asyncio.run(scrape_pipeline_async(max_listings, concurrency, search_url, checkpoint=checkpoint,
+                                                  writer=writer, snapshot=snapshot,
+                                                  parse_processes=parse_processes, cards=cards))
+                if snapshot is not None:
+                    snapshot.close()
+                print()
+            else:
+                print("▶ Pobieranie linków z Otodom...")
+                links = {link for link, _ in cards}
+                checkpoint.add_urls(sorted(links))
+                todo = checkpoint.pending_urls()
+                print(f"✔ Znaleziono {len(links)} ofert ({len(todo)} do pobrania). Scrapuję szczegóły...\n")
+                scrape_listings(todo, concurrency, checkpoint=checkpoint, writer=writer,
+                                parse_processes=parse_processes)
+        checkpoint.close()
+        print(f"\n✅ Zapisano {writer.count} ofert do '{output}'")
+    finally:
+        if metrics is not None:
+            METRICS.stop_export()
+            METRICS.export(metrics)
+        print(METRICS.summary())
+        if _limiter is not None and _limiter.hosts:
+            print(f"Tempo zapytań na końcu: {_limiter.describe()}")
+    if history is not None:
+        from history_otodom import append_crawl  # pandas/pyarrow potrzebne tylko przy zapisie historii
+        print(f"✅ Dopisano {append_crawl(output, history)} ofert do historii '{history}'")
+    return writer.count
+
+# --------- Main ---------
+def ask_max_listings() -> int | None:
+    """Pyta użytkownika o limit ogłoszeń."""
+    while True:
+        limit_input = input("Ile ogłoszeń pobrać? (wpisz liczbę lub Enter dla wszystkich): ").strip()
+        if limit_input == '' or limit_input.lower() == 'wszystkie':
+            return None
+        try:
+            max_listings = int(limit_input)
+            if max_listings <= 0:
+                raise ValueError
+            return max_listings
+        except ValueError:
+            print("Nieprawidłowa liczba")
+
+def ask_output_path(output: Path) -> Path:
+    """Jeśli plik wynikowy już istnieje, pyta o nową nazwę (Enter = nadpisanie)."""
+    if path.exists(output):
+        new_name = input(f"Plik '{output}' już istnieje. Podaj nową nazwę pliku (lub naciśnij Enter, aby nadpisać): ").strip()
+        if new_name:
+            return Path(new_name)
+    return output
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Pobieranie ofert wynajmu mieszkań z Otodom.")
+    parser.add_argument("--limit", type=int, help="maksymalna liczba ogłoszeń (domyślnie wszystkie)")
+    parser.add_argument("-o", "--output", help=f"plik wynikowy .csv lub .parquet (domyślnie {OUTPUT_CSV})")
+    parser.add_argument("--headless", action="store_true",
+                        help="bez żadnych pytań (domyślny limit, nadpisanie pliku) – np. dla crona")
+    parser.add_argument("--search-url", default=SEARCH_URL, help="adres listy wyników (np. z filtrami)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="równoległe zapytania o szczegóły")
+    parser.add_argument("--parse-processes", type=int, default=PARSE_PROCESSES,
+                        help="liczba procesów parsujących (0 = parsowanie w wątkach)")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="bez adaptacyjnego tempa zapytań (zawsze --concurrency naraz, bez limitu na sekundę)")
+    parser.add_argument("--no-pipeline", action="store_true", help="najpierw wszystkie linki, potem szczegóły")
+    parser.add_argument("--resume", action="store_true", help="wznów przerwany crawl z checkpointu")
+    parser.add_argument("--cache", action="store_true", help="dyskowy cache odpowiedzi z rewalidacją")
+    parser.add_argument("--offline", action="store_true", help="odtwarzanie wyłącznie z cache, bez sieci")
+    parser.add_argument("--incremental", action="store_true", help="szczegóły tylko nowych i zmienionych ofert")
+    parser.add_argument("--shards", type=int, default=1, help="liczba shardów, na które dzielony jest crawl")
+    parser.add_argument("--shard", type=int, default=0, help="numer tego sharda (0..shards-1)")
+    parser.add_argument("--shard-by", choices=("hash", "pages"), default="hash",
+                        help="podział po haszu URL-a albo po stronach wyników")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="odkrywanie ofert równolegle w wycinkach: województwo × cena × powierzchnia")
+    parser.add_argument("--history", nargs="?", const=HISTORY_DIR, type=Path, metavar="KATALOG",
+                        help=f"dopisz wynik do historii ofert (Parquet, domyślnie '{HISTORY_DIR}')")
+    parser.add_argument("--metrics", type=Path, metavar="PLIK",
+                        help="zapisuj metryki crawla: PLIK.prom (Prometheus) albo PLIK.json")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL,
+                        help=f"co ile sekund zapisywać metryki w trakcie crawla (domyślnie {METRICS_INTERVAL})")
+    parser.add_argument("--merge", nargs="+", metavar="PLIK",
+                        help="zamiast crawla: scal partycje shardów do --output (deduplikacja po url)")
+    parsed = parser.parse_args(args)
+    if parsed.shards < 1 or not 0 <= parsed.shard < parsed.shards:
+        parser.error("--shard musi być z zakresu 0..shards-1")
+    if parsed.limit is not None and parsed.limit <= 0:
+        parser.error("--limit musi być dodatnie")
+    return parsed
+
+def main(args: list[str] | None = None):
+    options = parse_args(args)
+    if options.merge:
+        output = options.output or OUTPUT_CSV
+        count = merge_partitions(options.merge, output)
+        print(f"✅ Scalono {len(options.merge)} partycji: {count} unikalnych ofert w '{output}'")
+        return
+
+    interactive = not options.headless and stdin.isatty()
+    max_listings = options.limit
+    if max_listings is None and interactive:
+        max_listings = ask_max_listings()
+    output = Path(options.output or OUTPUT_CSV)
+    if options.output is None and interactive and options.shards == 1:
+        output = ask_output_path(output)
+    run_crawl(output, max_listings, concurrency=options.concurrency, pipeline=not options.no_pipeline,
+              resume=options.resume, incremental=options.incremental, shard=options.shard,
+              shards=options.shards, shard_by=options.shard_by, search_url=options.search_url,
+              parse_processes=options.parse_processes, partitioned=options.partitioned,
+              history=options.history, metrics=options.metrics, metrics_interval=options.metrics_interval,
+              cache=options.cache, offline=options.offline, adaptive=not options.no_adaptive)
 
 if __name__=="__main__":
     main()
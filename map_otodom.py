@@ -0,0 +1,106 @@
+# map_otodom.py
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib import colormaps
+from matplotlib.collections import PolyCollection
+from matplotlib.colors import Normalize
+from matplotlib.patches import Patch
+from matplotlib.ticker import StrMethodFormatter
+
+from discovery_otodom import VOIVODESHIPS_JSON
+
+SIMPLIFY_TOLERANCE = 0.005   # stopnie (~0.5 km) – dokładność uproszczonych granic województw
+MISSING_COLOR = "lightgrey"
+
+
+def simplify_ring(ring: np.ndarray, tolerance: float = SIMPLIFY_TOLERANCE) -> np.ndarray:
+    """Upraszcza zamknięty pierścień algorytmem Douglasa-Peuckera (bez rekurencji)."""
+    if len(ring) <= 4:
+        return ring
+    keep = np.zeros(len(ring), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(ring) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        a, b = ring[start], ring[end]
+        points = ring[start + 1:end]
+        ab = b - a
+        length = np.hypot(*ab)
+        if length == 0:
+            distances = np.hypot(*(points - a).T)
+        else:
+            distances = np.abs(ab[0] * (points[:, 1] - a[1]) - ab[1] * (points[:, 0] - a[0])) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack += [(start, split), (split, end)]
+    simplified = ring[keep]
+    return simplified if len(simplified) >= 4 else ring
+
+
+@lru_cache(maxsize=4)
+def voivodeship_shapes(path: Path | str = VOIVODESHIPS_JSON,
+                       tolerance: float = SIMPLIFY_TOLERANCE) -> dict[str, list[np.ndarray]]:
+    """
+    Uproszczone kontury województw z dołączonego GeoJSON-a, gotowe do `PolyCollection`:
+    nazwa (małymi literami, jak kolumna "województwo") → lista pierścieni w rzucie
+    równoodległościowym (długość geograficzna skalowana cos(52°)). Liczone raz na proces.
+    """
+    with open(path, encoding="utf-8") as f:
+        features = json.load(f)["features"]
+    scale = np.array([np.cos(np.radians(52.0)), 1.0])
+    shapes = {}
+    for feature in features:
+        geometry = feature["geometry"]
+        polygons = geometry["coordinates"] if geometry["type"] == "MultiPolygon" else [geometry["coordinates"]]
+        shapes[feature["properties"]["name"].lower()] = [
+            simplify_ring(np.asarray(polygon[0], dtype="float64") * scale, tolerance)  # tylko kontur zewnętrzny
+            for polygon in polygons
+        ]
+    return shapes
+
+
+def choropleth(values: pd.Series, label: str, cmap: str = "Blues", ax=None):
+    """
+    Mapa województw pokolorowana wartościami *values* (indeks – nazwy województw, wielkość
+    liter bez znaczenia). Województwa bez danych są szare. Zgłasza ValueError, jeśli żadna
+    nazwa z indeksu nie pasuje do województwa.
+    """
+    shapes = voivodeship_shapes()
+    values = values.dropna()
+    values = pd.Series(values.to_numpy(), index=values.index.astype(str).str.strip().str.lower())
+    matched = values[values.index.isin(shapes.keys())]
+    if matched.empty:
+        raise ValueError("Brak danych dla województw z mapy")
+
+    norm = Normalize(matched.min(), matched.max())
+    colormap = colormaps[cmap]
+    rings, colors = [], []
+    for name, polygons in shapes.items():
+        color = colormap(norm(matched[name])) if name in matched.index else MISSING_COLOR
+        rings += polygons
+        colors += [color] * len(polygons)
+
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(7, 7))
+    else:
+        fig = ax.figure
+    ax.add_collection(PolyCollection(rings, facecolors=colors, edgecolors="black", linewidths=0.4))
+    ax.autoscale_view()
+    ax.set_aspect("equal")
+    ax.set_axis_off()
+    colorbar = fig.colorbar(plt.cm.ScalarMappable(norm=norm, cmap=colormap), ax=ax, shrink=0.7)
+    colorbar.set_label(label)
+    colorbar.ax.yaxis.set_major_formatter(StrMethodFormatter("{x:,.0f}"))
+    if len(matched) < len(shapes):
+        ax.legend(handles=[Patch(facecolor=MISSING_COLOR, edgecolor="black", label="Brak danych")], loc="lower left")
+    ax.set_title(f"{label} – mapa województw")
+    return fig
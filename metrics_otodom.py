@@ -0,0 +1,259 @@
+# metrics_otodom.py
+"""
+Metryki crawla: czasy etapów (strony wyników, pobieranie i parsowanie ofert, zapis) jako
+histogramy, bajty pobrane w każdym etapie, kody odpowiedzi HTTP, ponowienia, błędy według
+etapu i typu oraz odsetek pustych pól w sparsowanych ofertach (nagły wzrost zwykle oznacza
+zmianę układu strony). Eksport do JSON-a albo pliku tekstowego Prometheusa (node_exporter
+textfile collector) – na końcu crawla i co *interval* sekund w trakcie.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+# Górne granice kubełków histogramów czasu [s]
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Etapy crawla: pobranie i parsowanie strony wyników, pobranie i parsowanie oferty, zapis wiersza
+STAGES = ("search", "search_parse", "detail", "parse", "write")
+RECENT_ERRORS = 20        # ostatnie komunikaty błędów zachowywane w eksporcie
+FIELD_MISS_WARN = 0.95    # pole puste w prawie wszystkich ofertach – ostrzeżenie w podsumowaniu
+FIELD_MISS_MIN_ROWS = 20  # ...o ile sparsowano już tyle ofert
+PROMETHEUS_PREFIX = "otodom"
+
+
+class Histogram:
+    """Histogram czasów o stałych kubełkach (jak w Prometheusie), z sumą i liczbą obserwacji."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # ostatni – powyżej największej granicy (+Inf)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total, result = 0, []
+        for bound, count in zip((*map(str, self.buckets), "+Inf"), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float | None:
+        """Przybliżony kwantyl – górna granica kubełka, w którym wypada (None bez obserwacji)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return float(bound)
+        return float("inf")
+
+
+def _stage_order(name: str) -> int:
+    return STAGES.index(name) if name in STAGES else len(STAGES)
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CrawlMetrics:
+    """
+    Liczniki i histogramy jednego crawla, bezpieczne dla wątków. Etap mierzy się blokiem
+    `with metrics.stage("detail"): ...`; odpowiedzi HTTP z tego bloku (hak sesji
+    `on_response`) są przypisywane do tego etapu.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._exporter: tuple[threading.Thread, threading.Event] | None = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages: dict[str, Histogram] = {}
+            self.bytes: Counter[str] = Counter()
+            self.statuses: Counter[int] = Counter()
+            self.retries: Counter[str] = Counter()
+            self.errors: Counter[tuple[str, str]] = Counter()
+            self.recent_errors: deque[str] = deque(maxlen=RECENT_ERRORS)
+            self.rows = 0
+            self.field_misses: Counter[str] = Counter()
+
+    # ---------- zbieranie ----------
+    @contextmanager
+    def stage(self, name: str):
+        """Mierzy czas bloku jako etap *name* (bloki mogą być zagnieżdżone)."""
+        outer = getattr(self._local, "stage", None)
+        self._local.stage = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+            self._local.stage = outer
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self.stages.setdefault(name, Histogram()).observe(seconds)
+
+    def timed(self, name: str, func):
+        """*func* opakowana pomiarem etapu *name* (np. `writer.write`)."""
+        def wrapper(*args, **kwargs):
+            with self.stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def on_response(self, response, *args, **kwargs):
+        """Hak `requests` (session.hooks["response"]): status, bajty i ponowienia odpowiedzi."""
+        stage = getattr(self._local, "stage", None) or "other"
+        size = response.headers.get("Content-Length")
+        size = int(size) if size and size.isdigit() else len(response.content)
+        retries = getattr(getattr(response.raw, "retries", None), "history", ())
+        with self._lock:
+            self.statuses[response.status_code] += 1
+            self.bytes[stage] += size
+            for attempt in retries:
+                self.retries[str(attempt.status or type(attempt.error).__name__)] += 1
+
+    def error(self, stage: str, error: BaseException, context: str = ""):
+        with self._lock:
+            self.errors[stage, type(error).__name__] += 1
+            self.recent_errors.append(f"{datetime.now():%H:%M:%S} [{stage}] {context} {type(error).__name__}: {error}")
+
+    def observe_row(self, row: dict):
+        """Liczy puste pola sparsowanej oferty (przed uzupełnieniem domyślną wartością)."""
+        missing = [key for key, value in row.items() if value is None or (isinstance(value, str) and not value.strip())]
+        with self._lock:
+            self.rows += 1
+            self.field_misses.update(dict.fromkeys(row, 0))  # także pola bez braków (odsetek 0)
+            self.field_misses.update(missing)
+
+    # ---------- eksport ----------
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "start": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "czas_s": round(time.time() - self.started, 3),
+                "etapy": {
+                    name: {
+                        "liczba": h.count, "suma_s": round(h.sum, 3),
+                        "średnia_s": round(h.sum / h.count, 4) if h.count else None,
+                        "p50_s": h.quantile(0.5), "p95_s": h.quantile(0.95),
+                        "kubełki": dict(h.cumulative()),
+                    }
+                    for name, h in sorted(self.stages.items(), key=lambda item: _stage_order(item[0]))
+                },
+                "bajty": dict(self.bytes),
+                "statusy_http": {str(status): n for status, n in sorted(self.statuses.items())},
+                "ponowienia": dict(self.retries),
+                "błędy": [{"etap": stage, "typ": kind, "liczba": n} for (stage, kind), n in self.errors.items()],
+                "ostatnie_błędy": list(self.recent_errors),
+                "oferty": self.rows,
+                "puste_pola": {
+                    field: {"liczba": n, "odsetek": round(n / self.rows, 4)}
+                    for field, n in self.field_misses.most_common()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Metryki w formacie tekstowym Prometheusa."""
+        p = PROMETHEUS_PREFIX
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, samples: list[tuple[str, float]]):
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} {kind}")
+            lines.extend(f"{p}_{suffix} {value}" for suffix, value in samples)
+
+        with self._lock:
+            histogram = []
+            for stage, h in self.stages.items():
+                histogram += [(f'stage_seconds_bucket{{stage="{_label(stage)}",le="{le}"}}', n)
+                              for le, n in h.cumulative()]
+                histogram += [(f'stage_seconds_sum{{stage="{_label(stage)}"}}', round(h.sum, 6)),
+                              (f'stage_seconds_count{{stage="{_label(stage)}"}}', h.count)]
+            metric("stage_seconds", "histogram", "Czas etapów crawla", histogram)
+            metric("bytes_total", "counter", "Bajty pobrane w etapie",
+                   [(f'bytes_total{{stage="{_label(s)}"}}', n) for s, n in self.bytes.items()])
+            metric("http_responses_total", "counter", "Odpowiedzi HTTP według kodu",
+                   [(f'http_responses_total{{status="{s}"}}', n) for s, n in sorted(self.statuses.items())])
+            metric("http_retries_total", "counter", "Ponowienia zapytań według przyczyny",
+                   [(f'http_retries_total{{reason="{_label(r)}"}}', n) for r, n in self.retries.items()])
+            metric("errors_total", "counter", "Błędy według etapu i typu",
+                   [(f'errors_total{{stage="{_label(s)}",type="{_label(t)}"}}', n)
+                    for (s, t), n in self.errors.items()])
+            metric("offers_parsed_total", "counter", "Sparsowane oferty", [("offers_parsed_total", self.rows)])
+            metric("field_missing_total", "counter", "Oferty z pustym polem",
+                   [(f'field_missing_total{{field="{_label(f)}"}}', n) for f, n in self.field_misses.items()])
+            metric("field_missing_ratio", "gauge", "Odsetek ofert z pustym polem",
+                   [(f'field_missing_ratio{{field="{_label(f)}"}}', round(n / self.rows, 6))
+                    for f, n in self.field_misses.items()])
+            metric("crawl_start_timestamp_seconds", "gauge", "Początek crawla",
+                   [("crawl_start_timestamp_seconds", round(self.started, 3))])
+        metric("last_export_timestamp_seconds", "gauge", "Czas eksportu metryk",
+               [("last_export_timestamp_seconds", round(time.time(), 3))])
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path | str):
+        """Zapisuje metryki do *path* – Prometheus dla rozszerzenia .prom, w pozostałych przypadkach JSON."""
+        path = Path(path)
+        if path.suffix == ".prom":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=1)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        tmp.replace(path)  # kolektor nigdy nie widzi pliku w połowie zapisu
+
+    def start_export(self, path: Path | str, interval: float):
+        """Eksport co *interval* sekund w wątku tła – do `stop_export`."""
+        self.stop_export()
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    self.export(path)
+                except OSError as e:
+                    print(f"\n⚠ Nie udało się zapisać metryk do '{path}': {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        self._exporter = (thread, stop)
+
+    def stop_export(self):
+        if self._exporter is not None:
+            thread, stop = self._exporter
+            stop.set()
+            thread.join()
+            self._exporter = None
+
+    def summary(self) -> str:
+        """Krótkie podsumowanie do wypisania na końcu crawla."""
+        data = self.snapshot()
+        lines = ["Etapy crawla:"]
+        for name, stage in data["etapy"].items():
+            lines.append(f"  {name:<12} {stage['liczba']:>7} × średnio {stage['średnia_s'] * 1000:8.1f} ms"
+                         f"  (łącznie {stage['suma_s']:.1f} s, p95 ≤ {stage['p95_s']} s)")
+        if data["bajty"]:
+            lines.append("Pobrano: " + ", ".join(f"{s} {n / 2**20:.1f} MiB" for s, n in data["bajty"].items()))
+        if data["statusy_http"]:
+            lines.append("Odpowiedzi HTTP: " + ", ".join(f"{s}×{n}" for s, n in data["statusy_http"].items())
+                         + (f"; ponowienia: {sum(data['ponowienia'].values())}" if data["ponowienia"] else ""))
+        for error in data["błędy"]:
+            lines.append(f"⚠ Błędy w etapie {error['etap']}: {error['typ']} ×{error['liczba']}")
+        for field, miss in data["puste_pola"].items():
+            if data["oferty"] >= FIELD_MISS_MIN_ROWS and miss["odsetek"] >= FIELD_MISS_WARN:
+                lines.append(f"⚠ Pole '{field}' puste w {miss['odsetek']:.0%} ofert – czy zmienił się układ strony?")
+        return "\n".join(lines)
@@ -0,0 +1,287 @@
+# parser_otodom.py
+# Parsowanie stron ofert Otodom – czyste funkcje HTML → wiersz, bez operacji sieciowych
+# i bez konfiguracji crawla, dzięki czemu można je uruchamiać w procesach puli (`parse_batch`).
+import re
+from datetime import datetime
+
+from bs4 import BeautifulSoup, Tag
+
+try:
+    import lxml  # noqa: F401 – szybszy parser HTML, jeśli jest zainstalowany
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+try:
+    from orjson import loads as json_loads  # szybszy dekoder JSON, jeśli jest zainstalowany
+except ImportError:
+    from json import loads as json_loads
+
+
+def parse_location(location_str: str) -> dict[str, str | None]:
+    """Parse location string into components: województwo, powiat, miasto, dzielnica, ulica"""
+    if not location_str:
+        return {
+            'wojewodztwo': None,
+            'powiat': None,
+            'miasto': None,
+            'dzielnica': None,
+            'ulica': None
+        }
+    parts = [part.strip() for part in location_str.split(',')]
+    n = len(parts)
+    result = {
+        'wojewodztwo': None,
+        'powiat': None,
+        'miasto': None,
+        'dzielnica': None,
+        'ulica': None
+    }
+    if n == 0:
+        return result
+    # Województwo
+    result['wojewodztwo'] = parts[-1]
+    # Powiat (jeśli drugi od końca jest z małej litery)
+    powiat_idx = None
+    if n > 1 and parts[-2].islower():
+        result['powiat'] = parts[-2]
+        powiat_idx = n - 2
+    # Miasto
+    if powiat_idx is not None and n > 2:
+        result['miasto'] = parts[-3]
+        miasto_idx = n - 3
+    elif n > 1:
+        result['miasto'] = parts[-2]
+        miasto_idx = n - 2
+    else:
+        miasto_idx = None
+    # Ulica
+    ulica_idx = None
+    for i, part in enumerate(parts):
+        if part.startswith('ul.'):
+            result['ulica'] = part
+            ulica_idx = i
+            break
+    # Dzielnica
+    if result['ulica']:
+        # Jeśli ulica jest pierwszym elementem, dzielnica = brak informacji
+        if ulica_idx == 0:
+            result['dzielnica'] = None
+        # Jeśli jest coś przed ulicą i nie jest to miasto ani powiat, to to jest dzielnica
+        elif ulica_idx > 0:
+            # Sprawdzamy, czy element przed ulicą nie jest miastem ani powiatem
+            dzielnica_candidate = parts[ulica_idx - 1]
+            if (miasto_idx is not None and ulica_idx - 1 == miasto_idx) or (powiat_idx is not None and ulica_idx - 1 == powiat_idx):
+                result['dzielnica'] = None
+            elif not dzielnica_candidate.startswith('ul.'):
+                result['dzielnica'] = dzielnica_candidate
+            else:
+                result['dzielnica'] = None
+    elif miasto_idx is not None and miasto_idx > 0:
+        # Jeśli nie ma ulicy, a są co najmniej 3 elementy, dzielnica to element przed miastem, jeśli nie jest ulicą
+        dzielnica_candidate = parts[miasto_idx - 1]
+        if not dzielnica_candidate.startswith('ul.'):
+            result['dzielnica'] = dzielnica_candidate
+        else:
+            result['dzielnica'] = None
+    # Jeśli nie znaleziono dzielnicy, zostaje None
+    return result
+
+# Pola pojedyncze: selektor CSS ("css") albo etykieta z siatki szczegółów ("grid"),
+# której wartością jest następny akapit <p>. Kolejność wyznacza kolejność kolumn.
+DATAKEYS_TO_SINGLE_FIELDS = {
+    "title" : ("css", "h1[data-cy='adPageAdTitle']"),
+    "price" : ("css", "strong[data-cy='adPageHeaderPrice']"),
+    "deposit" : ("grid", "Kaucja:"),
+    "rooms" : ("grid", "Liczba pokoi:"),
+    "advertiser_type" : ("grid", "Typ ogłoszeniodawcy:"),
+    "heating" : ("grid", "Ogrzewanie:"),
+    "floor" : ("grid", "Piętro:"),
+    "finishing_state" : ("grid", "Stan wykończenia:"),
+    "available_from" : ("grid", "Dostępne od:"),
+    "building_year" : ("grid", "Rok budowy:"),
+    "elevator" : ("grid", "Winda:"),
+    "building_type" : ("grid", "Rodzaj zabudowy:"),
+    "building_material" : ("grid", "Materiał budynku:"),
+    "windows" : ("grid", "Okna:"),
+    "safety" : ("grid", "Bezpieczeństwo:"),
+    "location" : ("css", "div[data-sentry-element='Container'] a[data-sentry-element='StyledLink']"),
+    "area": ("grid", "Powierzchnia:"),
+}
+
+# Pola z siatki szczegółów, których wartością jest lista elementów <span>
+DATAKEYS_TO_MULTI_GRID_LABELS = {
+    "equipment" : "Wyposażenie:",
+    "security" : "Zabezpieczenia:",
+    "media" : "Media:",
+}
+
+ADDITIONAL_INFO_LABEL = "Informacje dodatkowe:"
+
+GRID_LABELS = (
+    *(label for source, label in DATAKEYS_TO_SINGLE_FIELDS.values() if source == "grid"),
+    *DATAKEYS_TO_MULTI_GRID_LABELS.values(),
+    ADDITIONAL_INFO_LABEL,
+)
+
+def item_grid_values(soup: BeautifulSoup) -> dict[str, list[Tag]]:
+    """
+    Jednym przejściem po siatce szczegółów (ItemGridContainer) buduje mapę etykieta → lista
+    elementów z wartością. Odpowiada selektorom `p:-soup-contains('Etykieta:') + p`
+    (kolejność dokumentu zachowana), ale nie skanuje drzewa osobno dla każdego pola.
+    """
+    values: dict[str, list[Tag]] = {}
+    for p in soup.select("div[data-sentry-element='ItemGridContainer'] p"):
+        text = p.get_text()
+        for label in GRID_LABELS:
+            if label in text:
+                value = p.find_next_sibling()
+                if value is not None and value.name == "p":
+                    values.setdefault(label, []).append(value)
+    return values
+
+def parse_html(html: str, url: str, use_next_data: bool = True) -> dict[str, str | None]:
+    """
+    Parsuje szczegóły ogłoszenia z pobranej strony – z osadzonego JSON-a strony,
+    a gdy go brak (lub *use_next_data* jest wyłączone), z wyrenderowanego DOM.
+    """
+    ad = next_data_ad(html) if use_next_data else None
+    if ad is not None:
+        return parse_listing_json(ad, url)
+    return parse_listing_dom(BeautifulSoup(html, HTML_PARSER), url)
+
+def parse_batch(pages: list[tuple[str, str]], use_next_data: bool = True) -> list[tuple[bool, dict | str]]:
+    """
+    Parsuje partię stron (html, url) – jedno zadanie dla procesu puli zamiast jednego na stronę.
+    Dla każdej strony zwraca (True, wiersz) albo (False, opis błędu).
+    """
+    results = []
+    for html, url in pages:
+        try:
+            results.append((True, parse_html(html, url, use_next_data)))
+        except Exception as e:
+            results.append((False, f"{type(e).__name__}: {e}"))
+    return results
+
+NEXT_DATA_RE = re.compile(r'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.S)
+
+def next_data_ad(html: str) -> dict | None:
+    """Zwraca obiekt oferty (`props.pageProps.ad`) z JSON-a Next.js lub None, gdy go brak."""
+    match = NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    try:
+        ad = json_loads(match.group(1))["props"]["pageProps"]["ad"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    return ad if isinstance(ad, dict) else None
+
+def _json_number(characteristic: dict | None) -> float | None:
+    """Surowa wartość liczbowa cechy oferty (np. {"key": "m", "value": "27.4"})."""
+    try:
+        return float(characteristic["value"])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+def _json_location(ad: dict) -> str | None:
+    """Składa adres z JSON-a w ten sam format co link lokalizacji na stronie: 'ulica, dzielnica, miasto, powiat, województwo'."""
+    address = (ad.get("location") or {}).get("address") or {}
+
+    def name(part: str) -> str | None:
+        return (address.get(part) or {}).get("name")
+
+    street = " ".join(str(x) for x in (name("street"), (address.get("street") or {}).get("number")) if x)
+    city = name("city")
+    county = name("county")
+    parts = [street, name("district"), city, county if county != city else None, name("province")]
+    return ", ".join(part for part in parts if part) or None
+
+def parse_listing_json(ad: dict, url: str) -> dict[str, str | None]:
+    """
+    Mapuje obiekt oferty z `__NEXT_DATA__` na te same kolumny co `parse_listing_dom`.
+    Etykiety cech (`characteristics`) i kategorii (`featuresByCategory`) to te same
+    polskie etykiety, które strona wyświetla w siatce szczegółów.
+    """
+    characteristics = ad.get("characteristics") or []
+    by_key = {c.get("key"): c for c in characteristics}
+    by_label = {f"{c.get('label')}:": c.get("localizedValue") for c in characteristics}
+    features = {f"{f.get('label')}:": f.get("values") or [] for f in ad.get("featuresByCategory") or []}
+    data: dict[str, str | None] = {}
+
+    for key, (source, query) in DATAKEYS_TO_SINGLE_FIELDS.items():
+        if key == "title":
+            data[key] = ad.get("title")
+        elif key == "price":
+            data[key] = (by_key.get("price") or {}).get("localizedValue")
+        elif key == "location":
+            data[key] = _json_location(ad)
+        elif key == "area":
+            data[key] = _json_number(by_key.get("m"))
+        elif query in by_label:
+            data[key] = by_label[query]
+        else:
+            data[key] = ", ".join(features.get(query, [])) or None
+
+    for key, label in DATAKEYS_TO_MULTI_GRID_LABELS.items():
+        data[key] = ", ".join(features.get(label, [])) or None
+
+    rent = _json_number(by_key.get("rent"))
+    data["rent_fee"] = int(rent) if rent is not None else None
+    data.update(parse_location(data["location"]))
+    data["additional_info"] = ", ".join(features.get(ADDITIONAL_INFO_LABEL, [])) or None
+    data["url"] = url
+    data["scrape_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return data
+
+def parse_listing_dom(soup: BeautifulSoup, url: str) -> dict[str, str | None]:
+    """Parsuje szczegóły ogłoszenia z wyrenderowanego HTML (selektory DOM)."""
+    data: dict[str, str | None] = {}
+    grid = item_grid_values(soup)
+
+    for key, (source, query) in DATAKEYS_TO_SINGLE_FIELDS.items():
+        if source == "css":
+            element = soup.select_one(query)
+        else:
+            element = grid[query][0] if query in grid else None
+        if key == "area" and element:
+            # Wyciągnij tylko liczbę (może być float) z tekstu np. "27.4 m²"
+            match = re.search(r"[\d,.]+", element.get_text(strip=True).replace(",", "."))
+            data[key] = float(match.group()) if match else None
+        else:
+            data[key] = element.get_text(strip=True) if element else None
+
+    for key, label in DATAKEYS_TO_MULTI_GRID_LABELS.items():
+        spans = [span for element in grid.get(label, []) for span in element.find_all("span")]
+        data[key] = ", ".join(span.get_text(strip=True) for span in spans) if spans else None
+
+    # Rent Fee (Additional Price)
+    fee_el = soup.select_one("div[data-sentry-element='AdditionalPriceWrapper']")
+    if fee_el:
+        fee_text = fee_el.get_text(strip=True)
+        match = re.search(r'\d+', fee_text)  # Extract only the numeric value
+        data["rent_fee"] = int(match.group()) if match else None
+    else:
+        data["rent_fee"] = None
+
+    # Parse location components
+    location_components = parse_location(data["location"])
+    data.update(location_components)
+
+    # Additional Information (lepsze rozdzielanie)
+    additional_info_el = grid[ADDITIONAL_INFO_LABEL][0] if ADDITIONAL_INFO_LABEL in grid else None
+    if additional_info_el:
+        spans = additional_info_el.find_all("span")
+        if spans:
+            data["additional_info"] = ", ".join(span.get_text(strip=True) for span in spans)
+        else:
+            text = additional_info_el.get_text(strip=True)
+            items = re.split(r'[;,•·\u2022\u2023\u25E6\u2043\u2219]', text)
+            data["additional_info"] = ", ".join(item.strip() for item in items if item.strip())
+    else:
+        data["additional_info"] = None
+
+    # URL & timestamp (unchanged)
+    data["url"] = url
+    data["scrape_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    return data
@@ -0,0 +1,192 @@
+# report_otodom.py
+"""
+Raport PNG z cenami za m²: wykres 20 najliczniejszych miast i po jednym wykresie dzielnic
+na miasto (dawniej test.py). Wykresy rysowane są bez okien (backend Agg) w puli procesów –
+do procesów trafiają tylko małe tabele agregatów z kostki – a każda figura jest zamykana
+zaraz po zapisie. Wykres, którego dane wejściowe i kod rysujący nie zmieniły się od
+poprzedniego uruchomienia, jest pomijany (skróty zapisane w `MANIFEST`).
+
+    python report_otodom.py [--csv otodom_wynajem.csv] [--out plots] [--workers 8] [--force]
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import matplotlib.ticker as ticker  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+from analytics_otodom import CSV_PATH, load_and_clean  # noqa: E402
+from cube_otodom import cube_for  # noqa: E402
+
+PLOTS_DIR = Path("plots")
+MANIFEST  = ".raport.json"   # w katalogu wykresów: plik PNG → skrót danych i kodu
+TOP_CITIES = 20
+DPI = 200
+
+
+def price_m2_table(stats: pd.DataFrame) -> pd.DataFrame:
+    """Liczba ogłoszeń z ceną za m² i jej mediana (kolumny jak w raporcie) – bez pustych grup."""
+    table = stats[["liczba_cen_m2", "mediana_cena_m2"]].set_axis(["liczba_ogłoszeń", "mediana_cena_za_m2"], axis=1)
+    return table[table["liczba_ogłoszeń"] > 0]
+
+
+# ---------- wykresy (wywoływane w procesach puli) ----------
+def render_cities(top_cities: pd.DataFrame, path: Path):
+    """Wykres główny – mediana ceny za m² w najliczniejszych miastach."""
+    sns.set(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(10, 10))
+    try:
+        palette = sns.color_palette("Spectral", len(top_cities))
+        sns.barplot(data=top_cities, y="miasto", x="mediana_cena_za_m2", hue="miasto",
+                    palette=palette, legend=False, ax=ax)
+
+        # Dodanie wartości na słupkach
+        for i, row in top_cities.iterrows():
+            ax.text(row["mediana_cena_za_m2"] + 0.1, i, f'{row["mediana_cena_za_m2"]:.1f}', color='black', va='center')
+            ax.text(0.5, i, f'{int(row["liczba_ogłoszeń"])}', color='black', va='center', ha='left')
+
+        ax.set_title(f"{len(top_cities)} miast z najwyższą medianą ceny wynajmu za m²", fontsize=16)
+        ax.set_xlabel("Cena za metr kwadratowy (zł/m²)")
+        ax.set_ylabel("Miasto")
+        ax.axvline(40, color="black", linestyle="--", alpha=0.7)
+        fig.tight_layout()
+        ax.xaxis.set_major_locator(ticker.MultipleLocator(5))
+        fig.savefig(path, dpi=DPI, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+
+
+def render_districts(city: str, dzielnice: pd.DataFrame, city_median: float, path: Path):
+    """Dzielnice miasta i mediany ceny za m² na tle mediany całego miasta."""
+    sns.set(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(8, 6))
+    try:
+        sns.barplot(data=dzielnice, y="dzielnica", x="mediana_cena_za_m2", hue="dzielnica",
+                    palette="Spectral", legend=False, orient="h", ax=ax)
+        # Dodaj wartości na słupkach
+        for i, (cnt, val) in enumerate(zip(dzielnice["liczba_ogłoszeń"], dzielnice["mediana_cena_za_m2"])):
+            ax.text(val + 0.2, i, f"{val:.1f}", va='center', fontsize=9)
+            ax.text(0, i, f"{cnt}", va='center', fontsize=8, color='black')
+
+        # Dodaj pionową linię z medianą miasta
+        ax.axvline(city_median, color="black", linestyle="--", alpha=0.7, label=f"Mediana miasta: {city_median:.1f} zł/m²")
+        ax.legend(loc="lower right", fontsize=9)
+
+        ax.set_title(f"{city} – dzielnice i ceny za m² (mediana miasta: {city_median:.1f} zł/m²)")
+        ax.set_xlabel("Cena za metr kwadratowy (mediana dla dzielnicy)")
+        ax.set_ylabel("Dzielnica")
+        fig.tight_layout()
+        fig.savefig(path, dpi=DPI, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+
+
+def _render(job: tuple) -> str:
+    render, args, path = job
+    tmp = path.with_name(path.stem + ".tmp.png")
+    render(*args, tmp)
+    tmp.replace(path)  # przerwany raport nie zostawia uciętego pliku
+    return path.name
+
+
+# ---------- planowanie ----------
+def chart_jobs(df: pd.DataFrame, out_dir: Path, top_n: int = TOP_CITIES) -> list[tuple]:
+    """Zadania (funkcja rysująca, argumenty, plik) wyliczone z kostki agregatów."""
+    cube = cube_for(df)
+    cities = price_m2_table(cube.stats("miasto"))
+    districts = price_m2_table(cube.stats("dzielnica"))
+
+    top_cities = (
+        cities
+        .sort_values(by="liczba_ogłoszeń", ascending=False)
+        .head(top_n)
+        .sort_values("mediana_cena_za_m2", ascending=False)
+        .reset_index()
+    )
+    jobs = [(render_cities, (top_cities,), out_dir / f"miasta_top{top_n}.png")]
+
+    # Miasta do analizy dzielnic – w tej samej kolejności co na wykresie
+    with_districts = set(districts.index.get_level_values("miasto"))
+    for city in top_cities["miasto"]:
+        if city not in with_districts:
+            continue
+        dzielnice = districts.loc[city].sort_values("mediana_cena_za_m2", ascending=False).reset_index()
+        if dzielnice.shape[0] < 2:  # Pomijaj miasta bez dzielnic
+            continue
+        city_median = float(cities.loc[city, "mediana_cena_za_m2"])
+        filename = f"{city}_dzielnice.png".replace(os.sep, "-")
+        jobs.append((render_districts, (city, dzielnice, city_median), out_dir / filename))
+    return jobs
+
+
+def job_digest(job: tuple) -> str:
+    """Skrót danych wejściowych wykresu i kodu funkcji rysującej."""
+    render, args, _ = job
+    digest = hashlib.sha1(inspect.getsource(render).encode())
+    digest.update(str(DPI).encode())
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            digest.update(pd.util.hash_pandas_object(arg, index=True).to_numpy().tobytes())
+            digest.update(json.dumps(list(arg.columns), ensure_ascii=False).encode())
+        else:
+            digest.update(repr(arg).encode())
+    return digest.hexdigest()
+
+
+def generate_report(csv_path: Path | str = CSV_PATH, out_dir: Path | str = PLOTS_DIR,
+                    workers: int | None = None, force: bool = False, top_n: int = TOP_CITIES,
+                    dedup: bool = False) -> list[str]:
+    """
+    Generuje (tylko zmienione) wykresy raportu do *out_dir* w *workers* procesach
+    (domyślnie tyle, ile rdzeni). Przy *dedup* każde mieszkanie wystawione pod kilkoma
+    adresami jest liczone raz. Zwraca nazwy narysowanych plików.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = out_dir / MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+
+    jobs = chart_jobs(load_and_clean(csv_path, dedup=dedup), out_dir, top_n)
+    digests = {job[2].name: job_digest(job) for job in jobs}
+    todo = [job for job in jobs
+            if force or manifest.get(job[2].name) != digests[job[2].name] or not job[2].exists()]
+    print(f"▶ Wykresy: {len(jobs)} ({len(jobs) - len(todo)} bez zmian, {len(todo)} do narysowania)")
+
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(todo) <= 1:
+        rendered = [_render(job) for job in todo]
+    else:
+        with ProcessPoolExecutor(min(workers, len(todo))) as pool:
+            rendered = list(pool.map(_render, todo))
+
+    manifest = {name: digest for name, digest in digests.items()}
+    manifest_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+    print(f"✅ Zapisano {len(rendered)} wykresów do '{out_dir}'")
+    return rendered
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", type=Path, default=CSV_PATH, help="plik z ofertami")
+    parser.add_argument("--out", type=Path, default=PLOTS_DIR, help="katalog na wykresy")
+    parser.add_argument("--workers", type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    parser.add_argument("--top", type=int, default=TOP_CITIES, help="liczba miast na wykresie głównym")
+    parser.add_argument("--force", action="store_true", help="rysuj wszystkie wykresy, także niezmienione")
+    parser.add_argument("--dedup", action="store_true", help="licz raz oferty-duplikaty (zob. dedup_otodom.py)")
+    options = parser.parse_args(args)
+    generate_report(options.csv, options.out, options.workers, options.force, options.top, options.dedup)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# snapshot_otodom.py
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+SNAPSHOT_DB = Path("otodom_snapshot.sqlite")
+
+NEW, CHANGED, UNCHANGED = "new", "changed", "unchanged"
+
+
+class OfferSnapshot:
+    """
+    Migawka ofert z poprzednich crawli (SQLite) na potrzeby crawla przyrostowego:
+    dla każdego URL-a odcisk karty z listy wyników (cena, tytuł), ostatni pobrany wiersz
+    i status active / delisted. Karta z niezmienionym odciskiem nie wymaga pobierania
+    szczegółów, a oferta niewidziana w pełnym przejściu listy wyników jest oznaczana jako zdjęta.
+    """
+
+    def __init__(self, path: Path | str = SNAPSHOT_DB):
+        self.path = Path(path)
+        self.run_started = _now()  # znacznik bieżącego przebiegu (last_seen)
+        self.stats = {NEW: 0, CHANGED: 0, UNCHANGED: 0}
+        self._lock = Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS offers (
+                    url          TEXT PRIMARY KEY,
+                    fingerprint  TEXT,
+                    row          TEXT,
+                    status       TEXT NOT NULL DEFAULT 'active',
+                    first_seen   TEXT NOT NULL,
+                    last_seen    TEXT NOT NULL,
+                    delisted_at  TEXT
+                )""")
+
+    def observe(self, url: str, fingerprint: str) -> str:
+        """
+        Rejestruje kartę widzianą w bieżącym przebiegu i klasyfikuje ofertę jako
+        new (brak pobranego wiersza), changed (inny odcisk) albo unchanged.
+        """
+        with self._lock, self._conn:
+            found = self._conn.execute("SELECT fingerprint, row FROM offers WHERE url = ?", (url,)).fetchone()
+            if found is None:
+                self._conn.execute(
+                    "INSERT INTO offers (url, first_seen, last_seen) VALUES (?, ?, ?)",
+                    (url, self.run_started, self.run_started),
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE offers SET last_seen = ?, status = 'active', delisted_at = NULL WHERE url = ?",
+                    (self.run_started, url),
+                )
+        if found is None or found[1] is None:
+            kind = NEW
+        elif found[0] != fingerprint:
+            kind = CHANGED
+        else:
+            kind = UNCHANGED
+        self.stats[kind] += 1
+        return kind
+
+    def stored_row(self, url: str) -> dict | None:
+        with self._lock:
+            found = self._conn.execute("SELECT row FROM offers WHERE url = ?", (url,)).fetchone()
+        return json.loads(found[0]) if found and found[0] else None
+
+    def save(self, url: str, fingerprint: str, row: dict):
+        """Zapisuje świeżo pobrany wiersz wraz z odciskiem karty, z którą był zgodny."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE offers SET fingerprint = ?, row = ? WHERE url = ?",
+                (fingerprint, json.dumps(row, ensure_ascii=False), url),
+            )
+
+    def mark_delisted(self) -> int:
+        """Oznacza jako zdjęte oferty aktywne, których nie było w bieżącym przebiegu."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE offers SET status = 'delisted', delisted_at = ? WHERE status = 'active' AND last_seen < ?",
+                (self.run_started, self.run_started),
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,238 @@
+# sql_otodom.py
+"""
+Zapytania SQL (DuckDB) bezpośrednio na wynikach crawla – plikach CSV/Parquet z main_otodom.py
+albo katalogu historii (history_otodom.py) – bez wczytywania całej ramki przez `load_and_clean`.
+Widok `oferty` ma te same kolumny pomocnicze co oczyszczona ramka (`miesięcznie_num`,
+`powierzchnia_num`, `cena_m2`, `pokoje_num`, ...) i tak samo odrzuca skrajne ceny, a DuckDB
+czyta tylko kolumny i (dla Parquet) grupy wierszy potrzebne danemu zapytaniu.
+
+    python sql_otodom.py stats --level dzielnica --city Kraków
+    python sql_otodom.py --source historia stats --level miasto --since 2025-06-01
+    python sql_otodom.py sql "SELECT miasto, count(*) FROM oferty GROUP BY ALL ORDER BY 2 DESC LIMIT 5"
+"""
+import argparse
+from pathlib import Path
+from typing import Iterable
+
+import pandas as pd
+
+from analytics_otodom import CSV_PATH, TRIM_QUANTILES
+from cube_otodom import LEVELS
+
+VIEW = "oferty"
+# Kolumny liczbowe jak w `clean_columns`: tekst "3 200 zł" → 3200.0
+NUMERIC_COLUMNS = ["miesięcznie", "czynsz", "kaucja", "powierzchnia"]
+# Kolumny liczbowe zapisane już w historii (history_otodom.NUMERIC) – filtry na nich
+# korzystają ze statystyk Parquet
+HISTORY_NUMERIC = {"miesięcznie": "cena", "powierzchnia": "powierzchnia_m2"}
+# Filtry zapytań (`stats`, `price_m2`, `rooms`, `prices`): argument → warunek z parametrem;
+# miasto i dzielnica bez rozróżniania wielkości liter, jak w `hist_rent_city`
+FILTERS = {
+    "voivodeship": "województwo = ?",
+    "city": "lower(miasto) = lower(?)",
+    "district": "lower(dzielnica) = lower(?)",
+    "rooms": "pokoje_num = ?",
+    "since": "data_pobrania >= ?",
+    "until": "data_pobrania < ?",
+    "min_price": "miesięcznie_num >= ?",
+    "max_price": "miesięcznie_num <= ?",
+}
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError as e:
+        raise ImportError("Zapytania SQL wymagają biblioteki duckdb (pip install duckdb)") from e
+    return duckdb
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(text: str) -> str:
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _number(column: str) -> str:
+    """SQL odpowiadający `to_number`: zostają cyfry, przecinki, kropki i minus."""
+    cleaned = f"replace(regexp_replace({_quote(column)}, '[^0-9,.-]', '', 'g'), ',', '.')"
+    return f"TRY_CAST({cleaned} AS DOUBLE)"
+
+
+def _scan(sources: list[Path]) -> tuple[str, bool]:
+    """Wywołanie funkcji tabelowej DuckDB dla źródeł i informacja, czy to katalog historii."""
+    if len(sources) == 1 and sources[0].is_dir():
+        pattern = _literal((sources[0] / "**" / "*.parquet").as_posix())
+        return f"read_parquet({pattern}, hive_partitioning = true, union_by_name = true)", True
+    files = "[" + ", ".join(_literal(path.as_posix()) for path in sources) + "]"
+    if all(path.suffix.lower() == ".parquet" for path in sources):
+        return f"read_parquet({files}, union_by_name = true)", False
+    # wszystko jako tekst – tak jak `pd.read_csv(dtype="str")` w load_and_clean
+    return f"read_csv({files}, header = true, all_varchar = true, union_by_name = true)", False
+
+
+class OfferQuery:
+    """
+    Połączenie DuckDB z widokiem `oferty` nad *source* (plik CSV/Parquet, lista plików tego
+    samego rodzaju albo katalog historii). Przy *trim* odrzucane są skrajne ceny miesięczne
+    (`TRIM_QUANTILES`) – progi liczone raz, ze wszystkich ofert źródła, jak w `load_and_clean`.
+
+        with OfferQuery("otodom_wynajem.csv") as q:
+            q.stats("dzielnica", city="Kraków")
+            q.sql("SELECT avg(cena_m2) FROM oferty WHERE miasto = ?", ["Gdańsk"])
+    """
+
+    def __init__(self, source: Path | str | Iterable[Path | str] = CSV_PATH, trim: bool = True,
+                 threads: int | None = None):
+        duckdb = _require_duckdb()
+        sources = [Path(source)] if isinstance(source, (str, Path)) else [Path(s) for s in source]
+        self.con = duckdb.connect()
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        scan, history = _scan(sources)
+        self.con.execute(f"CREATE VIEW surowe AS SELECT * FROM {scan}")
+        self.columns = [row[0] for row in self.con.execute("DESCRIBE surowe").fetchall()]
+        self.con.execute(f"CREATE VIEW czyste AS {self._clean_select(history)}")
+        self.con.execute(f"CREATE VIEW {VIEW} AS SELECT * FROM czyste {self._trim() if trim else ''}")
+
+    def _clean_select(self, history: bool) -> str:
+        """Kolumny źródła + kolumny pomocnicze z `clean_columns` (SQL zamiast pandas)."""
+        derived = {}
+        for col in NUMERIC_COLUMNS:
+            if history and HISTORY_NUMERIC.get(col) in self.columns:
+                derived[col + "_num"] = _quote(HISTORY_NUMERIC[col])
+            elif col in self.columns:
+                derived[col + "_num"] = _number(col)
+        derived["cena_m2"] = "miesięcznie_num / nullif(powierzchnia_num, 0)"
+        if "liczba pokoi" in self.columns:
+            derived["pokoje_num"] = "TRY_CAST(nullif(regexp_extract(\"liczba pokoi\", '\\d+'), '') AS DOUBLE)"
+        if "data_pobrania" in self.columns:
+            derived["data_pobrania"] = "TRY_CAST(data_pobrania AS TIMESTAMP)"
+        kept = [_quote(col) for col in self.columns if col not in derived]
+        # kolumny liczone z poprzednich (cena_m2) – w zewnętrznym SELECT
+        inner = kept + [f"{expr} AS {_quote(name)}" for name, expr in derived.items() if name != "cena_m2"]
+        outer = "*" + (f", {derived['cena_m2']} AS cena_m2"
+                       if {"miesięcznie_num", "powierzchnia_num"} <= derived.keys() else "")
+        return f"SELECT {outer} FROM (SELECT {', '.join(inner)} FROM surowe)"
+
+    def _trim(self) -> str:
+        """Warunek odrzucający skrajne ceny; progi liczone raz (DuckDB czyta przy tym tylko kolumnę ceny)."""
+        if "miesięcznie_num" not in self.sql("SELECT * FROM czyste LIMIT 0").columns:
+            return ""
+        low, high = TRIM_QUANTILES
+        bounds = self.con.execute(f"SELECT quantile_cont(miesięcznie_num, [{low}, {high}]) FROM czyste").fetchone()[0]
+        if bounds is None:
+            return ""
+        return f"WHERE miesięcznie_num BETWEEN {float(bounds[0])!r} AND {float(bounds[1])!r}"
+
+    # ---------- zapytania ----------
+    def sql(self, query: str, params: list | dict | None = None) -> pd.DataFrame:
+        """Dowolne zapytanie (z parametrami `?` albo `$nazwa`) na widoku `oferty`."""
+        return self.con.execute(query, params).df()
+
+    def _where(self, filters: dict) -> tuple[str, list]:
+        clauses, params = [], []
+        for name, value in filters.items():
+            if value is not None:
+                clauses.append(FILTERS[name])
+                params.append(value)
+        return ("WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def stats(self, level: str = "miasto", min_offers: int = 1, **filters) -> pd.DataFrame:
+        """
+        Tabela jak `AggregateCube.stats(level)` (poziomy z `LEVELS`): liczba_ogłoszeń,
+        liczba_cen_m2, średnia_cena, średnia_cena_m2, mediana_cena, mediana_cena_m2 – dla ofert
+        spełniających *filters* (`FILTERS`, np. city="Kraków", rooms=2, since="2025-06-01")
+        i grup z co najmniej *min_offers* ofertami.
+        """
+        keys = ", ".join(_quote(key) for key in LEVELS[level])
+        where, params = self._where(filters)
+        not_null = " AND ".join(f"{_quote(key)} IS NOT NULL" for key in LEVELS[level])
+        where = f"{where} AND {not_null}" if where else f"WHERE {not_null}"
+        df = self.sql(f"""
+            SELECT {keys},
+                   count(*) AS liczba_ogłoszeń,
+                   count(cena_m2) AS liczba_cen_m2,
+                   avg(miesięcznie_num) AS średnia_cena,
+                   avg(cena_m2) AS średnia_cena_m2,
+                   median(miesięcznie_num) AS mediana_cena,
+                   median(cena_m2) AS mediana_cena_m2
+            FROM {VIEW} {where}
+            GROUP BY {keys}
+            HAVING count(*) >= ?
+            ORDER BY {keys}
+        """, params + [min_offers])
+        return df.set_index(LEVELS[level])
+
+    def price_m2(self, **filters) -> pd.DataFrame:
+        """Liczba ofert, średnia, mediana oraz kwartyle ceny za m² dla ofert spełniających *filters*."""
+        where, params = self._where(filters)
+        return self.sql(f"""
+            SELECT count(cena_m2) AS liczba_ofert, avg(cena_m2) AS średnia, median(cena_m2) AS mediana,
+                   quantile_cont(cena_m2, 0.25) AS q25, quantile_cont(cena_m2, 0.75) AS q75
+            FROM {VIEW} {where}
+        """, params)
+
+    def rooms(self, **filters) -> pd.DataFrame:
+        """Podział według liczby pokoi (`stats("pokoje")`) z udziałem w ofertach."""
+        df = self.stats("pokoje", **filters)
+        df["udział"] = df["liczba_ogłoszeń"] / df["liczba_ogłoszeń"].sum()
+        return df
+
+    def prices(self, column: str = "miesięcznie_num", **filters) -> pd.Series:
+        """Wartości kolumny *column* dla ofert spełniających *filters* (np. do histogramu miasta)."""
+        if column not in self.sql(f"SELECT * FROM {VIEW} LIMIT 0").columns:
+            raise ValueError(f"Kolumna '{column}' nie istnieje")
+        where, params = self._where(filters)
+        return self.sql(f"SELECT {_quote(column)} FROM {VIEW} {where}", params)[column]
+
+    def close(self):
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", type=Path, action="append",
+                        help="plik CSV/Parquet z crawla (można powtórzyć) albo katalog historii")
+    parser.add_argument("--no-trim", action="store_true", help="nie odrzucaj skrajnych cen")
+    commands = parser.add_subparsers(dest="command", required=True)
+    stats = commands.add_parser("stats", help="liczba ofert, średnie i mediany w grupach")
+    stats.add_argument("--level", default="miasto", choices=list(LEVELS))
+    stats.add_argument("--min-offers", type=int, default=1)
+    for name in ("price_m2", "rooms"):
+        commands.add_parser(name.replace("_", "-"), help="cena za m²" if name == "price_m2" else "podział według pokoi")
+    for command in commands.choices.values():
+        command.add_argument("--wojewodztwo", dest="voivodeship")
+        command.add_argument("--city")
+        command.add_argument("--district")
+        command.add_argument("--rooms", type=int)
+        command.add_argument("--since", help="od dnia RRRR-MM-DD")
+        command.add_argument("--until", help="przed dniem RRRR-MM-DD")
+    sql = commands.add_parser("sql", help="dowolne zapytanie na widoku 'oferty'")
+    sql.add_argument("query")
+    options = parser.parse_args(args)
+
+    with OfferQuery(options.source or [CSV_PATH], trim=not options.no_trim) as q:
+        if options.command == "sql":
+            table = q.sql(options.query)
+        else:
+            filters = {name: getattr(options, name) for name in FILTERS if hasattr(options, name)}
+            if options.command == "stats":
+                table = q.stats(options.level, options.min_offers, **filters).reset_index()
+            elif options.command == "rooms":
+                table = q.rooms(**filters).reset_index()
+            else:
+                table = q.price_m2(**filters)
+        print(table.round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# streaming_otodom.py
+"""
+Analizy historii ofert kawałkami (out-of-core): statystyki liczone są ze strumienia
+fragmentów CSV, a mediany i progi odcięcia skrajnych cen – ze szkiców kwantyli (KLL),
+które można łączyć między fragmentami, plikami i procesami. Pamięć zależy od liczby grup
+i parametru szkicu, a nie od liczby wierszy.
+
+    python streaming_otodom.py historia/*.csv --by miasto --by miasto dzielnica
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from analytics_otodom import ANALYSIS_COLUMNS, CSV_PATH, TRIM_QUANTILES, clean_columns, to_number
+
+CHUNK_BYTES = 32 << 20  # rozmiar fragmentu CSV czytanego naraz
+ROW_BYTES   = 500       # przybliżony rozmiar wiersza – do przeliczenia fragmentu na wiersze bez pyarrow
+SKETCH_K    = 1000      # dokładność szkicu: błąd rangi rzędu 0,1% (pamięć ~3k liczb na grupę)
+
+
+class QuantileSketch:
+    """
+    Szkic kwantyli KLL (Karnin, Lang, Liberty 2016). Poziom h przechowuje próbki o wadze 2^h;
+    przepełniony poziom jest sortowany, a co druga próbka (losowo parzyste lub nieparzyste)
+    przechodzi poziom wyżej. Liczba, suma, minimum i maksimum są dokładne. Dopóki żaden
+    poziom nie został skompaktowany (do ok. *k* wartości), kwantyle też są dokładne –
+    liczone tak jak `Series.quantile`.
+    """
+
+    def __init__(self, k: int = SKETCH_K, seed: int = 0):
+        self.k = k
+        self.levels: list[np.ndarray] = [np.empty(0)]
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: Iterable[float]):
+        """Dodaje wartości (NaN są pomijane)."""
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += values.size
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Dołącza drugi szkic (np. z innego pliku lub procesu) i zwraca self."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                rest = items[len(items) - len(items) % 2:]   # przy nieparzystej liczbie jedna zostaje
+                promoted = items[self._rng.integers(2):len(items) - len(rest):2]
+                self.levels[level] = rest
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    @property
+    def exact(self) -> bool:
+        return all(not len(items) for items in self.levels[1:])
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else np.nan
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return np.nan
+        if self.exact:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1])
+        return float(items[order][min(index, len(items) - 1)])
+
+
+class GroupStats:
+    """
+    Liczba, średnia i mediana (szkic) kolumny *value* w grupach wg kolumn *by* –
+    aktualizowane fragmentami i łączone między plikami (`merge`).
+    """
+
+    def __init__(self, by: tuple[str, ...], value: str = "cena_m2", k: int = SKETCH_K):
+        self.by = tuple(by)
+        self.value = value
+        self.k = k
+        self.sketches: dict[tuple, QuantileSketch] = {}
+
+    def _sketch(self, key: tuple) -> QuantileSketch:
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = QuantileSketch(self.k, seed=len(self.sketches))
+        return sketch
+
+    def update(self, chunk: pd.DataFrame):
+        chunk = chunk.dropna(subset=[self.value])
+        for key, values in chunk.groupby(list(self.by), sort=False)[self.value]:
+            self._sketch(key).update(values.to_numpy())
+
+    def merge(self, other: "GroupStats") -> "GroupStats":
+        for key, sketch in other.sketches.items():
+            self._sketch(key).merge(sketch)
+        return self
+
+    def summary(self) -> pd.DataFrame:
+        """Tabela jak `groupby(by).agg(...)`: liczba_ogłoszeń, średnia i mediana wartości."""
+        index = pd.MultiIndex.from_tuples(list(self.sketches) or [(None,) * len(self.by)],
+                                          names=self.by)[:len(self.sketches)]
+        if len(self.by) == 1:
+            index = index.get_level_values(0)
+        return pd.DataFrame({
+            "liczba_ogłoszeń": [s.count for s in self.sketches.values()],
+            f"średnia_{self.value}": [s.mean for s in self.sketches.values()],
+            f"mediana_{self.value}": [s.quantile(0.5) for s in self.sketches.values()],
+        }, index=index).sort_values("liczba_ogłoszeń", ascending=False, kind="stable")
+
+
+def iter_chunks(path: Path | str, chunk_bytes: int = CHUNK_BYTES,
+                columns: list[str] = ANALYSIS_COLUMNS) -> Iterator[pd.DataFrame]:
+    """
+    Kolejne fragmenty pliku z kolumnami *columns* jako tekst (brakujące – puste). Z pyarrow
+    plik czytany jest strumieniowo i wielowątkowo, bez niego – `read_csv(chunksize=...)`.
+    """
+    try:
+        import pyarrow as pa
+        from pyarrow import csv
+    except ImportError:
+        wanted = set(columns)
+        with pd.read_csv(path, usecols=lambda c: c in wanted, dtype="str",
+                         chunksize=max(1, chunk_bytes // ROW_BYTES)) as reader:
+            for chunk in reader:
+                yield chunk.reindex(columns=columns)
+        return
+    reader = csv.open_csv(
+        path,
+        read_options=csv.ReadOptions(block_size=chunk_bytes),
+        convert_options=csv.ConvertOptions(
+            include_columns=columns, include_missing_columns=True,
+            column_types={c: pa.string() for c in columns}, strings_can_be_null=True,
+        ),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def iter_clean_chunks(path: Path | str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[pd.DataFrame]:
+    """Kolejne fragmenty pliku po `clean_columns` (bez odcinania skrajnych cen)."""
+    for chunk in iter_chunks(path, chunk_bytes):
+        yield clean_columns(chunk)
+
+
+def price_sketch(path: Path | str, chunk_bytes: int = CHUNK_BYTES, k: int = SKETCH_K) -> QuantileSketch:
+    """Szkic miesięcznych cen z jednego pliku – pierwsze przejście (progi odcięcia)."""
+    sketch = QuantileSketch(k)
+    for chunk in iter_chunks(path, chunk_bytes, columns=["miesięcznie"]):
+        sketch.update(to_number(chunk["miesięcznie"]).to_numpy())
+    return sketch
+
+
+def group_stats(path: Path | str, groupings: list[tuple[str, ...]], low: float, high: float,
+                chunk_bytes: int = CHUNK_BYTES, k: int = SKETCH_K) -> list[GroupStats]:
+    """Statystyki grup z jednego pliku dla ofert o cenie w [low, high] – drugie przejście."""
+    stats = [GroupStats(by, k=k) for by in groupings]
+    for chunk in iter_clean_chunks(path, chunk_bytes):
+        chunk = chunk[(chunk["miesięcznie_num"] >= low) & (chunk["miesięcznie_num"] <= high)]
+        for group in stats:
+            group.update(chunk)
+    return stats
+
+
+def _map_files(func, paths: list, workers: int, *args) -> list:
+    if workers <= 1 or len(paths) <= 1:
+        return [func(path, *args) for path in paths]
+    with ProcessPoolExecutor(min(workers, len(paths))) as pool:
+        return list(pool.map(func, paths, *([arg] * len(paths) for arg in args)))
+
+
+def stream_summary(paths: Iterable[Path | str] = (CSV_PATH,),
+                   groupings: Iterable[tuple[str, ...]] = (("miasto",), ("miasto", "dzielnica")),
+                   chunk_bytes: int = CHUNK_BYTES, workers: int = 1,
+                   k: int = SKETCH_K) -> dict[tuple[str, ...], pd.DataFrame]:
+    """
+    Odpowiednik `load_and_clean` + `groupby(...).agg(count, mean, median)` dla dowolnie
+    dużej historii w wielu plikach. Dwa przejścia: progi odcięcia skrajnych cen z połączonego
+    szkicu cen, potem statystyki grup. Pliki przetwarzane są niezależnie (przy *workers* > 1
+    w osobnych procesach), a ich szkice łączone.
+    """
+    paths = [Path(p) for p in paths]
+    groupings = [tuple(by) for by in groupings]
+    prices = QuantileSketch(k)
+    for sketch in _map_files(price_sketch, paths, workers, chunk_bytes, k):
+        prices.merge(sketch)
+    low, high = prices.quantile(TRIM_QUANTILES[0]), prices.quantile(TRIM_QUANTILES[1])
+
+    merged = [GroupStats(by, k=k) for by in groupings]
+    for per_file in _map_files(group_stats, paths, workers, groupings, low, high, chunk_bytes, k):
+        for total, part in zip(merged, per_file):
+            total.merge(part)
+    return {group.by: group.summary() for group in merged}
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", type=Path, default=[CSV_PATH], help="pliki CSV z historią")
+    parser.add_argument("--by", nargs="+", action="append", metavar="KOLUMNA",
+                        help="kolumny grupowania (można podać wielokrotnie; domyślnie miasto)")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_BYTES >> 20, help="rozmiar fragmentu CSV [MB]")
+    parser.add_argument("--workers", type=int, default=1, help="liczba procesów (po jednym pliku)")
+    parser.add_argument("--top", type=int, default=20, help="liczba wyświetlanych grup")
+    options = parser.parse_args(args)
+
+    summaries = stream_summary(options.paths, options.by or [("miasto",)],
+                               options.chunk_mb << 20, options.workers)
+    for by, table in summaries.items():
+        print(f"\n▶ {' / '.join(by)}")
+        print(table.head(options.top).round(1).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# throttle_otodom.py
+"""
+Adaptacyjne tempo crawla zamiast stałego opóźnienia: dla każdego hosta limit zapytań w locie
+i tempo zapytań na sekundę (kubełek żetonów), sterowane według AIMD – po każdym „oknie”
+udanych odpowiedzi o umiarkowanym czasie limit rośnie o 1, a tempo o `RATE_STEP` (do
+pierwszego sygnału przeciążenia oba rosną dwukrotnie – jak slow start w TCP); sygnał
+przeciążenia (429/403/503 albo czas odpowiedzi powyżej `LATENCY_TARGET`) zmniejsza oba
+o połowę, najwyżej raz na `COOLDOWN`. Nagłówek Retry-After wstrzymuje zapytania do hosta
+na wskazany czas.
+
+Blokujące `slot(url)` wywołują wątki pobierające; odpowiedzi trafiają do `on_response`
+(hak sesji requests), więc sygnały widzi też cache z rewalidacją.
+"""
+import math
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from threading import Condition
+from urllib.parse import urlparse
+
+THROTTLE_STATUSES = (403, 429, 503)  # odpowiedzi oznaczające „zwolnij” (403 – blokada anty-botowa)
+INITIAL_RATE   = 4.0    # zapytań/s do hosta na starcie
+MIN_RATE       = 0.2
+MAX_RATE       = 50.0
+RATE_STEP      = 1.0    # przyrost tempa po każdym oknie udanych odpowiedzi
+DECREASE       = 0.5    # mnożnik limitu i tempa po sygnale przeciążenia
+LATENCY_TARGET = 3.0    # s – wolniejsza odpowiedź też jest sygnałem przeciążenia
+COOLDOWN       = 2.0    # s – kolejne sygnały w tym czasie nie zmniejszają tempa ponownie
+THROTTLE_PAUSE = 5.0    # s – wstrzymanie hosta po 429/403 bez nagłówka Retry-After
+MAX_PAUSE      = 300.0  # s – górna granica wstrzymania z Retry-After
+
+
+def retry_after(value: str | None, now: float | None = None) -> float | None:
+    """Sekundy z nagłówka Retry-After (liczba sekund albo data HTTP) lub None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+@dataclass
+class HostState:
+    limit: int                 # dozwolone zapytania w locie
+    rate: float                # zapytań/s
+    tokens: float = 1.0
+    refilled: float = 0.0      # time.monotonic() ostatniego uzupełnienia żetonów
+    in_flight: int = 0
+    paused_until: float = 0.0
+    successes: int = 0         # udane odpowiedzi w bieżącym oknie
+    decreased: float = -math.inf
+    throttled: int = 0         # sygnały przeciążenia od początku crawla
+
+
+class AdaptiveLimiter:
+    """
+    Sterownik tempa zapytań (AIMD) dla wielu hostów, bezpieczny dla wątków.
+    *max_concurrency* to górna granica zapytań w locie (np. liczba wątków pobierających).
+    """
+
+    def __init__(self, max_concurrency: int, initial_rate: float = INITIAL_RATE,
+                 min_rate: float = MIN_RATE, max_rate: float = MAX_RATE,
+                 latency_target: float = LATENCY_TARGET, verbose: bool = True):
+        self.max_concurrency = max(1, max_concurrency)
+        self.initial_rate = initial_rate
+        self.min_rate, self.max_rate = min_rate, max_rate
+        self.latency_target = latency_target
+        self.verbose = verbose
+        self.hosts: dict[str, HostState] = {}
+        self._cond = Condition()
+
+    def _host(self, host: str) -> HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            start = max(1, self.max_concurrency // 2)  # w połowie – jak slow start
+            state = self.hosts[host] = HostState(start, self.initial_rate, refilled=time.monotonic())
+        return state
+
+    @contextmanager
+    def slot(self, url: str):
+        """Czeka na wolne miejsce w limicie i żeton tempa hosta z *url*; zwalnia je po bloku."""
+        host = urlparse(url).hostname or ""
+        with self._cond:
+            state = self._host(host)
+            while True:
+                now = time.monotonic()
+                state.tokens = min(1.0, state.tokens + (now - state.refilled) * state.rate)
+                state.refilled = now
+                if now < state.paused_until:
+                    timeout = state.paused_until - now
+                elif state.in_flight >= state.limit:
+                    timeout = None  # do zwolnienia miejsca
+                elif state.tokens >= 1.0:
+                    state.tokens -= 1.0
+                    state.in_flight += 1
+                    break
+                else:
+                    timeout = (1.0 - state.tokens) / state.rate
+                self._cond.wait(timeout)
+        try:
+            yield
+        finally:
+            with self._cond:
+                state.in_flight -= 1
+                self._cond.notify_all()
+
+    def on_response(self, response, *args, **kwargs):
+        """Hak requests: sygnał z odpowiedzi (status, czas, Retry-After, ponowienia 503 z urllib3)."""
+        host = urlparse(response.url).hostname or ""
+        latency = response.elapsed.total_seconds()
+        status = response.status_code
+        if status not in THROTTLE_STATUSES:
+            history = getattr(getattr(response.raw, "retries", None), "history", ())
+            status = next((a.status for a in history if a.status in THROTTLE_STATUSES), status)
+        self.feedback(host, status, latency, retry_after(response.headers.get("Retry-After")))
+
+    def feedback(self, host: str, status: int, latency: float, pause: float | None = None):
+        """Aktualizuje limit i tempo hosta po odpowiedzi o kodzie *status* i czasie *latency*."""
+        with self._cond:
+            state = self._host(host)
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES and (pause is not None or status != 503):
+                pause = min(pause if pause is not None else THROTTLE_PAUSE, MAX_PAUSE)
+                state.paused_until = max(state.paused_until, now + pause)
+            else:
+                pause = None
+            if status in THROTTLE_STATUSES or latency > self.latency_target:
+                state.throttled += 1
+                state.successes = 0
+                if now - state.decreased >= COOLDOWN:
+                    state.decreased = now
+                    state.limit = max(1, int(state.limit * DECREASE))
+                    state.rate = max(self.min_rate, state.rate * DECREASE)
+                    if self.verbose:
+                        reason = f"HTTP {status}" if status in THROTTLE_STATUSES else f"odpowiedź {latency:.1f} s"
+                        print(f"\n⚠ {host}: {reason} – zwalniam do {state.rate:.1f} zapytań/s, "
+                              f"{state.limit} naraz" + (f", pauza {pause:.0f} s" if pause else ""))
+            elif status < 500:
+                state.successes += 1
+                if state.successes >= state.limit:  # jedno „okno” udanych odpowiedzi
+                    state.successes = 0
+                    if state.throttled == 0:  # slow start
+                        state.limit, state.rate = state.limit * 2, state.rate * 2
+                    else:
+                        state.limit, state.rate = state.limit + 1, state.rate + RATE_STEP
+                    state.limit = min(self.max_concurrency, state.limit)
+                    state.rate = min(self.max_rate, state.rate)
+            self._cond.notify_all()
+
+    def describe(self) -> str:
+        with self._cond:
+            return ", ".join(f"{host}: {s.rate:.1f}/s, {s.limit} naraz, {s.throttled}× zwolnienie"
+                             for host, s in self.hosts.items())
@@ -0,0 +1,150 @@
+# writer_otodom.py
+from pathlib import Path
+from threading import Lock
+from typing import Iterable
+
+from pandas import DataFrame, concat, read_csv, read_parquet
+
+# Mapowanie nazw kolumn na polskie. Kolejność kluczy to kolejność pól w wierszu z
+# `parse_listing`, a więc i stała kolejność kolumn w pliku wynikowym.
+POLISH_COLUMNS = {
+    'title': 'tytuł',
+    'price': 'miesięcznie',
+    'deposit': 'kaucja',
+    'rooms': 'liczba pokoi',
+    'advertiser_type': 'typ ogłoszeniodawcy',
+    'heating': 'ogrzewanie',
+    'floor': 'piętro',
+    'finishing_state': 'stan wykończenia',
+    'available_from': 'dostępne od',
+    'building_year': 'rok budowy',
+    'elevator': 'winda',
+    'building_type': 'rodzaj zabudowy',
+    'building_material': 'materiał budynku',
+    'windows': 'okna',
+    'safety': 'bezpieczeństwo',
+    'location': 'lokalizacja',
+    'area': 'powierzchnia',
+    'equipment': 'wyposażenie',
+    'security': 'zabezpieczenia',
+    'media': 'media',
+    'rent_fee': 'czynsz',
+    'wojewodztwo': 'województwo',
+    'powiat': 'powiat',
+    'miasto': 'miasto',
+    'dzielnica': 'dzielnica',
+    'ulica': 'ulica',
+    'additional_info': 'informacje dodatkowe',
+    'url': 'url',
+    'scrape_date': 'data_pobrania'
+}
+
+WRITE_BATCH = 500   # liczba wierszy zapisywanych jednorazowo (jedna grupa wierszy w Parquet)
+
+
+class RowWriter:
+    """
+    Zapisuje wiersze przyrostowo, partiami po *batch_size*, do CSV albo Parquet (wybór po
+    rozszerzeniu pliku). Schemat jest stały – kolumny z `POLISH_COLUMNS` – więc w pamięci
+    trzymana jest tylko bieżąca partia. Każda partia Parquet to osobna grupa wierszy (row group);
+    kolumny zapisywane są jako tekst, tak jak w CSV.
+
+    Tylko CSV można czytać w trakcie crawla i po jego awarii – każda partia jest od razu
+    kompletna. Stopka Parquet (metadane grup wierszy) powstaje dopiero w `close()`, więc
+    przerwany zapis Parquet jest nieczytelny; wiersze odtwarza wtedy `--resume`
+    z checkpointu (`CheckpointStore.rows()`), zapisując plik od nowa.
+    """
+
+    def __init__(self, path: Path | str, batch_size: int = WRITE_BATCH):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer: list[dict] = []
+        self._lock = Lock()
+        if self.path.suffix.lower() == ".parquet":
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as e:
+                raise ImportError("Zapis do Parquet wymaga biblioteki pyarrow (pip install pyarrow)") from e
+            self._pa = pa
+            self._schema = pa.schema([(name, pa.string()) for name in POLISH_COLUMNS.values()])
+            self._parquet = pq.ParquetWriter(self.path, self._schema)
+            self._csv = None
+        else:
+            self._parquet = None
+            self._csv = open(self.path, "w", encoding="utf-8-sig", newline="")
+            self._csv_header = True
+
+    def write(self, row: dict):
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.batch_size:
+                self._flush()
+
+    def write_many(self, rows: Iterable[dict]):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        df = DataFrame(self._buffer, columns=list(POLISH_COLUMNS)).rename(columns=POLISH_COLUMNS)
+        if self._parquet is not None:
+            df = df.astype(object).where(df.notna(), None)
+            data = {col: [None if v is None else str(v) for v in df[col]] for col in df.columns}
+            self._parquet.write_table(self._pa.Table.from_pydict(data, schema=self._schema))
+        else:
+            df.to_csv(self._csv, index=False, header=self._csv_header)
+            self._csv_header = False
+            self._csv.flush()
+        self.count += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._parquet is not None:
+                self._parquet.close()
+            else:
+                if self._csv_header:  # brak wierszy – sam nagłówek
+                    DataFrame(columns=list(POLISH_COLUMNS.values())).to_csv(self._csv, index=False)
+                self._csv.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_partition(path: Path | str) -> DataFrame:
+    """Wczytuje plik wynikowy (CSV lub Parquet) z wszystkimi kolumnami jako tekst."""
+    path = Path(path)
+    if path.suffix.lower() == ".parquet":
+        return read_parquet(path)
+    return read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+
+
+def merge_partitions(parts: Iterable[Path | str], output: Path | str) -> int:
+    """
+    Scala partycje shardów w jeden plik wynikowy. Oferta obecna w kilku partycjach
+    (ten sam `url`) zostaje raz – w najnowszej wersji wg `data_pobrania`.
+    Zwraca liczbę unikalnych ofert.
+    """
+    df = concat([read_partition(part) for part in parts], ignore_index=True)
+    df = (
+        df.sort_values("data_pobrania", kind="stable")
+        .drop_duplicates("url", keep="last")
+        .sort_index()
+    )
+    output = Path(output)
+    if output.suffix.lower() == ".parquet":
+        df.to_parquet(output, index=False)
+    else:
+        df.to_csv(output, index=False, encoding="utf-8-sig")
+    return len(df)